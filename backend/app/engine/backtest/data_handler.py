@@ -11,6 +11,7 @@ import logging
 from datetime import datetime
 from typing import Any, Iterator
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -27,6 +28,11 @@ class HistoricalDataHandler:
       - Allow the runner to query historical bars up to the current position
         (look-ahead bias prevention).
 
+    Alongside the DataFrames, each symbol's OHLCV columns are aligned to the
+    master timestamp list once at construction as an ``(N, 5)`` float array
+    with a presence mask, so per-bar lookups are plain integer indexing
+    rather than ``DataFrame.loc`` calls.
+
     Args:
         ohlcv_records: List of OHLCVData model instances (or dicts with the
             same fields: ``tradingsymbol``, ``exchange``, ``time``, ``open``,
@@ -52,6 +58,18 @@ class HistoricalDataHandler:
         # Sorted list of all unique timestamps across all symbols
         self._timestamps: list[datetime] = []
 
+        # Per-symbol OHLCV arrays aligned to ``_timestamps`` (NaN where the
+        # symbol has no bar) and the matching presence masks
+        self._arrays: dict[tuple[str, str], np.ndarray] = {}
+        self._present: dict[tuple[str, str], np.ndarray] = {}
+
+        # First (symbol, exchange) key seen for each symbol
+        self._symbol_keys: dict[str, tuple[str, str]] = {}
+
+        # get_current_prices() result and the bar index it was built for
+        self._prices_cache: dict[str, float] = {}
+        self._prices_cache_index: int = -1
+
         # Build internal data structures
         self._build_dataframes(ohlcv_records)
 
@@ -107,6 +125,14 @@ class HistoricalDataHandler:
         # Sorted master timestamp list
         self._timestamps = sorted(all_timestamps)
 
+        # Align every symbol to the master timeline once
+        master_index = pd.Index(self._timestamps)
+        for key, df in self._dataframes.items():
+            aligned = df.reindex(master_index)
+            self._arrays[key] = aligned.to_numpy(dtype=np.float64)
+            self._present[key] = aligned["close"].notna().to_numpy()
+            self._symbol_keys.setdefault(key[0], key)
+
         logger.info(
             "HistoricalDataHandler built: %d symbols, %d total bars",
             len(self._dataframes),
@@ -143,21 +169,37 @@ class HistoricalDataHandler:
             self._current_index = idx
             ts = self._timestamps[idx]
             bar_data: dict[str, dict] = {}
-            for (symbol, exchange), df in self._dataframes.items():
-                if ts in df.index:
-                    row = df.loc[ts]
-                    bar_data[symbol] = {
-                        "open": float(row["open"]),
-                        "high": float(row["high"]),
-                        "low": float(row["low"]),
-                        "close": float(row["close"]),
-                        "volume": int(row["volume"]),
-                        "timestamp": ts,
-                        "exchange": exchange,
-                    }
+            for key, present in self._present.items():
+                if present[idx]:
+                    bar_data[key[0]] = self._bar_dict(key, idx)
             if bar_data:
                 yield ts, bar_data
 
+    def iter_timestamps(self) -> Iterator[datetime]:
+        """
+        Advance through the bars yielding only the timestamp.
+
+        Equivalent to iterating the handler but skips building the per-bar
+        ``data`` dicts, for callers that read bars through
+        :meth:`get_current_bar` / :meth:`get_current_prices` instead.
+        """
+        for idx, ts in enumerate(self._timestamps):
+            self._current_index = idx
+            yield ts
+
+    def as_arrays(self) -> tuple[list[datetime], dict[str, np.ndarray]]:
+        """
+        Return ``(timestamps, arrays)`` for vectorised consumers.
+
+        ``arrays`` maps each symbol to an ``(N, 5)`` float array with columns
+        ``[open, high, low, close, volume]`` aligned to ``timestamps``; rows
+        where the symbol has no bar are NaN.  The arrays are shared, not
+        copied, and must not be modified.
+        """
+        return self._timestamps, {
+            symbol: self._arrays[key] for symbol, key in self._symbol_keys.items()
+        }
+
     # ------------------------------------------------------------------
     # Look-back queries (no look-ahead bias)
     # ------------------------------------------------------------------
@@ -200,25 +242,11 @@ class HistoricalDataHandler:
             else:
                 return {}
 
-        df = self._find_df(symbol)
-        if df is None or self._current_index < 0:
-            return {}
-
-        current_ts = self._timestamps[self._current_index]
-        if current_ts not in df.index:
+        key = self._symbol_keys.get(symbol)
+        idx = self._current_index
+        if key is None or idx < 0 or not self._present[key][idx]:
             return {}
-
-        row = df.loc[current_ts]
-        exchange = self._find_exchange(symbol)
-        return {
-            "open": float(row["open"]),
-            "high": float(row["high"]),
-            "low": float(row["low"]),
-            "close": float(row["close"]),
-            "volume": int(row["volume"]),
-            "timestamp": current_ts,
-            "exchange": exchange,
-        }
+        return self._bar_dict(key, idx)
 
     def get_current_price(self, symbol: str) -> float:
         """Return the close price of the current bar for *symbol*."""
@@ -230,17 +258,25 @@ class HistoricalDataHandler:
         return bar["close"]
 
     def get_current_prices(self) -> dict[str, float]:
-        """Return ``{symbol: close_price}`` for all symbols at the current bar."""
-        if self._current_index < 0:
+        """
+        Return ``{symbol: close_price}`` for all symbols at the current bar.
+
+        The dict is built once per bar and shared between callers, so it
+        must not be modified -- copy it before adding prices.
+        """
+        idx = self._current_index
+        if idx < 0:
             return {}
+        if idx == self._prices_cache_index:
+            return self._prices_cache
 
-        current_ts = self._timestamps[self._current_index]
         prices: dict[str, float] = {}
+        for key, present in self._present.items():
+            if present[idx]:
+                prices[key[0]] = float(self._arrays[key][idx, 3])
 
-        for (symbol, _exchange), df in self._dataframes.items():
-            if current_ts in df.index:
-                prices[symbol] = float(df.loc[current_ts, "close"])
-
+        self._prices_cache = prices
+        self._prices_cache_index = idx
         return prices
 
     def get_bar_at(self, symbol: str, index: int) -> dict | None:
@@ -253,40 +289,34 @@ class HistoricalDataHandler:
         if index < 0 or index >= len(self._timestamps):
             return None
 
-        df = self._find_df(symbol)
-        if df is None:
+        key = self._symbol_keys.get(symbol)
+        if key is None or not self._present[key][index]:
             return None
-
-        ts = self._timestamps[index]
-        if ts not in df.index:
-            return None
-
-        row = df.loc[ts]
-        exchange = self._find_exchange(symbol)
-        return {
-            "open": float(row["open"]),
-            "high": float(row["high"]),
-            "low": float(row["low"]),
-            "close": float(row["close"]),
-            "volume": int(row["volume"]),
-            "timestamp": ts,
-            "exchange": exchange,
-        }
+        return self._bar_dict(key, index)
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _bar_dict(self, key: tuple[str, str], index: int) -> dict:
+        """Build the bar dict for *key* at absolute *index* from its array."""
+        o, h, l, c, v = self._arrays[key][index].tolist()
+        return {
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "volume": int(v),
+            "timestamp": self._timestamps[index],
+            "exchange": key[1],
+        }
+
     def _find_df(self, symbol: str) -> pd.DataFrame | None:
         """Look up the DataFrame for *symbol* across all exchanges."""
-        for (sym, _exch), df in self._dataframes.items():
-            if sym == symbol:
-                return df
-        return None
+        key = self._symbol_keys.get(symbol)
+        return self._dataframes[key] if key is not None else None
 
     def _find_exchange(self, symbol: str) -> str:
         """Look up the exchange for *symbol*."""
-        for sym, exch in self._dataframes.keys():
-            if sym == symbol:
-                return exch
-        return "NSE"
+        key = self._symbol_keys.get(symbol)
+        return key[1] if key is not None else "NSE"
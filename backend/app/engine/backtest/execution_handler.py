@@ -77,9 +77,13 @@ class SimulatedExecutionHandler:
         flat_commission: float = 0.0,
     ) -> None:
         self.slippage_pct = slippage_percent / 100.0  # convert to fraction
+        # Price multipliers for buys (slip up) and sells (slip down)
+        self._buy_slippage = 1 + self.slippage_pct
+        self._sell_slippage = 1 - self.slippage_pct
         if fill_at not in ("next_open", "current_close"):
             raise ValueError(f"fill_at must be 'next_open' or 'current_close', got '{fill_at}'")
         self.fill_at = fill_at
+        self._fill_next_open = fill_at == "next_open"
         self.commission_type = commission_type.lower()
         self.flat_commission = flat_commission
 
@@ -107,19 +111,15 @@ class SimulatedExecutionHandler:
             next_bar: OHLCV dict for the bar *after* the order was placed.
                       Required when ``fill_at="next_open"``.
         """
-        order_type = order.order_type.upper()
-
-        if order_type == "MARKET":
-            return self._fill_market(order, current_bar, next_bar)
-        elif order_type == "LIMIT":
-            return self._fill_limit(order, current_bar, next_bar)
-        elif order_type == "SL":
-            return self._fill_stop_loss(order, current_bar, next_bar)
-        elif order_type in ("SL-M", "SL_M"):
-            return self._fill_stop_loss_market(order, current_bar, next_bar)
-        else:
+        order_type = order.order_type
+        if not order_type.isupper():
+            order_type = order_type.upper()
+
+        fill_method = _FILL_METHODS.get(order_type)
+        if fill_method is None:
             logger.warning("Unknown order type '%s' -- treating as MARKET", order_type)
-            return self._fill_market(order, current_bar, next_bar)
+            fill_method = SimulatedExecutionHandler._fill_market
+        return fill_method(self, order, current_bar, next_bar)
 
     # ------------------------------------------------------------------
     # Charges calculation
@@ -334,7 +334,7 @@ class SimulatedExecutionHandler:
         self, current_bar: dict, next_bar: Optional[dict]
     ) -> Optional[float]:
         """Determine the base fill price based on the ``fill_at`` setting."""
-        if self.fill_at == "next_open":
+        if self._fill_next_open:
             if next_bar is None:
                 # No next bar (last bar of data) -- fall back to current close
                 return current_bar.get("close")
@@ -347,16 +347,16 @@ class SimulatedExecutionHandler:
         self, current_bar: dict, next_bar: Optional[dict]
     ) -> Optional[dict]:
         """Return the bar on which execution is evaluated."""
-        if self.fill_at == "next_open":
+        if self._fill_next_open:
             return next_bar if next_bar is not None else current_bar
         return current_bar
 
     def _apply_slippage(self, price: float, side: str) -> float:
         """Apply slippage to a price.  Buys slip up, sells slip down."""
         if side.upper() == "BUY":
-            return round(price * (1 + self.slippage_pct), 2)
+            return round(price * self._buy_slippage, 2)
         else:
-            return round(price * (1 - self.slippage_pct), 2)
+            return round(price * self._sell_slippage, 2)
 
     def _create_fill(
         self,
@@ -376,7 +376,7 @@ class SimulatedExecutionHandler:
         )
 
         # Fill timestamp: use execution bar's timestamp
-        if self.fill_at == "next_open" and next_bar is not None:
+        if self._fill_next_open and next_bar is not None:
             fill_ts = next_bar.get("timestamp", order.timestamp)
         else:
             fill_ts = current_bar.get("timestamp", order.timestamp)
@@ -391,3 +391,13 @@ class SimulatedExecutionHandler:
             commission=commission,
             order_id=order.order_id,
         )
+
+
+# Fill method for each (upper-cased) order type
+_FILL_METHODS = {
+    "MARKET": SimulatedExecutionHandler._fill_market,
+    "LIMIT": SimulatedExecutionHandler._fill_limit,
+    "SL": SimulatedExecutionHandler._fill_stop_loss,
+    "SL-M": SimulatedExecutionHandler._fill_stop_loss_market,
+    "SL_M": SimulatedExecutionHandler._fill_stop_loss_market,
+}
@@ -157,19 +157,14 @@ def calculate_max_drawdown(equity_curve: list[dict]) -> float:
     if len(equity_curve) < 2:
         return 0.0
 
-    equities = [pt["equity"] for pt in equity_curve]
-    peak = equities[0]
-    max_dd = 0.0
-
-    for eq in equities:
-        if eq > peak:
-            peak = eq
-        if peak > 0:
-            dd = (eq - peak) / peak
-            if dd < max_dd:
-                max_dd = dd
+    equities = np.array([pt["equity"] for pt in equity_curve], dtype=float)
+    peaks = np.maximum.accumulate(equities)
+    positive = peaks > 0
+    if not positive.any():
+        return 0.0
 
-    return max_dd
+    drawdowns = (equities[positive] - peaks[positive]) / peaks[positive]
+    return min(0.0, float(drawdowns.min()))
 
 
 def calculate_drawdown_curve(equity_curve: list[dict]) -> list[dict]:
@@ -182,22 +177,15 @@ def calculate_drawdown_curve(equity_curve: list[dict]) -> list[dict]:
     if not equity_curve:
         return []
 
-    result = []
-    peak = equity_curve[0]["equity"]
-
-    for pt in equity_curve:
-        eq = pt["equity"]
-        if eq > peak:
-            peak = eq
-
-        dd_pct = ((eq - peak) / peak * 100) if peak > 0 else 0.0
-
-        result.append({
-            "timestamp": pt["timestamp"],
-            "drawdown_percent": round(dd_pct, 4),
-        })
+    equities = np.array([pt["equity"] for pt in equity_curve], dtype=float)
+    peaks = np.maximum.accumulate(equities)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd_pct = np.where(peaks > 0, (equities - peaks) / peaks * 100, 0.0)
 
-    return result
+    return [
+        {"timestamp": pt["timestamp"], "drawdown_percent": round(dd, 4)}
+        for pt, dd in zip(equity_curve, dd_pct.tolist())
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -46,6 +46,10 @@ class OptionsHandler:
         self._expiry_dates: list[date] = []
         # Available strikes per expiry
         self._strikes_by_expiry: dict[date, list[float]] = {}
+        # get_option_bar results for the most recent timestamp queried:
+        # tradingsymbol -> bar (or None when no usable bar exists)
+        self._bar_cache_ts: Optional[datetime] = None
+        self._bar_cache: dict[str, Optional[dict]] = {}
 
     def set_underlying(self, instruments: list, strike_step: float = 50.0):
         """Set the underlying instrument info from backtest config."""
@@ -96,6 +100,8 @@ class OptionsHandler:
         OHLCV columns indexed by timestamp.
         """
         self._options_ohlcv = options_data
+        self._bar_cache_ts = None
+        self._bar_cache.clear()
         logger.info("OptionsHandler loaded OHLCV for %d option symbols", len(options_data))
 
     def get_active_expiry(self, bar_date: date) -> Optional[date]:
@@ -130,7 +136,24 @@ class OptionsHandler:
         return sorted(result, key=lambda x: (x["strike"], x["option_type"]))
 
     def get_option_bar(self, tradingsymbol: str, bar_timestamp: datetime) -> Optional[dict]:
-        """Get full OHLCV bar for an option at a given timestamp."""
+        """Get full OHLCV bar for an option at a given timestamp.
+
+        The same option is typically looked up several times per bar (price
+        and high helpers, mark-to-market, fill simulation), so results are
+        memoized for the current timestamp.  A copy is returned because the
+        runner overwrites the bar's ``timestamp`` for fills.
+        """
+        if bar_timestamp != self._bar_cache_ts:
+            self._bar_cache.clear()
+            self._bar_cache_ts = bar_timestamp
+        try:
+            bar = self._bar_cache[tradingsymbol]
+        except KeyError:
+            bar = self._bar_cache[tradingsymbol] = self._lookup_option_bar(tradingsymbol, bar_timestamp)
+        return dict(bar) if bar is not None else None
+
+    def _lookup_option_bar(self, tradingsymbol: str, bar_timestamp: datetime) -> Optional[dict]:
+        """Resolve the OHLCV bar for *tradingsymbol* at *bar_timestamp* (uncached)."""
         df = self._options_ohlcv.get(tradingsymbol)
         if df is None or df.empty:
             return None
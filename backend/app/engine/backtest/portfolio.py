@@ -8,14 +8,57 @@ backtest progresses bar by bar.
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Optional
 
-from app.engine.common.events import FillEvent
+from app.engine.common.events import FillEvent, OrderEvent
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class Position:
+    """An open position held by the :class:`Portfolio`."""
+
+    symbol: str
+    exchange: str
+    side: str  # 'LONG' or 'SHORT'
+    side_sign: int  # +1 for LONG, -1 for SHORT
+    quantity: int
+    avg_price: float
+    total_cost: float
+    entry_timestamp: Any
+    entry_order_id: str = ""
+
+    @classmethod
+    def from_fill(cls, fill: FillEvent, quantity: int) -> "Position":
+        """Open a position in the fill's direction for *quantity* units."""
+        is_buy = fill.side.upper() == "BUY"
+        return cls(
+            symbol=fill.symbol,
+            exchange=fill.exchange,
+            side="LONG" if is_buy else "SHORT",
+            side_sign=1 if is_buy else -1,
+            quantity=quantity,
+            avg_price=fill.fill_price,
+            total_cost=fill.fill_price * quantity,
+            entry_timestamp=fill.timestamp,
+            entry_order_id=fill.order_id,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the public dict form used by ``get_position()``."""
+        return {
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "side": self.side,
+            "side_sign": self.side_sign,
+            "quantity": self.quantity,
+            "avg_price": self.avg_price,
+        }
+
+
 class Portfolio:
     """
     In-memory portfolio state manager for a single backtest run.
@@ -25,7 +68,7 @@ class Portfolio:
       - Open positions (keyed by symbol)
       - Equity curve (list of {timestamp, equity} snapshots)
       - Completed (round-trip) trades
-      - All order records
+      - All orders placed
 
     Args:
         initial_capital: Starting cash in INR.
@@ -35,17 +78,20 @@ class Portfolio:
         self.initial_capital: float = initial_capital
         self.cash: float = initial_capital
 
-        # Open positions: {symbol: {quantity, avg_price, side, exchange, total_cost}}
-        self.positions: dict[str, dict[str, Any]] = {}
+        # Open positions keyed by symbol
+        self.positions: dict[str, Position] = {}
 
-        # Equity curve snapshots
-        self.equity_curve: list[dict[str, Any]] = []
+        # Equity curve snapshots, stored as parallel timestamp / value lists;
+        # the ``equity_curve`` dicts are built from them on demand
+        self._equity_timestamps: list[Any] = []
+        self._equity_values: list[float] = []
+        self._equity_curve: list[dict[str, Any]] = []
 
         # Completed round-trip trades
         self.trades: list[dict[str, Any]] = []
 
-        # All order records (for reference / debugging)
-        self.orders: list[dict[str, Any]] = []
+        # All orders placed, in order (status is updated in place)
+        self.orders: list[OrderEvent] = []
 
         # Running totals for charge tracking
         self.total_charges: float = 0.0
@@ -93,7 +139,7 @@ class Portfolio:
             else:
                 self.cash += (fill.fill_price * fill.quantity) - fill.commission
         else:
-            pos_side = position["side"]
+            pos_side = position.side
 
             if (is_buy and pos_side == "LONG") or (not is_buy and pos_side == "SHORT"):
                 # Adding to an existing position in the same direction
@@ -117,32 +163,17 @@ class Portfolio:
         Get the current position for *symbol*.
 
         Returns a dict with keys:
-          ``symbol, exchange, side, quantity, avg_price``
+          ``symbol, exchange, side, side_sign, quantity, avg_price``
         or ``None`` if flat.
         """
         pos = self.positions.get(symbol)
         if pos is None:
             return None
-        return {
-            "symbol": symbol,
-            "exchange": pos["exchange"],
-            "side": pos["side"],
-            "quantity": pos["quantity"],
-            "avg_price": pos["avg_price"],
-        }
+        return pos.to_dict()
 
     def get_all_positions(self) -> list[dict]:
         """Return a list of all open positions."""
-        result = []
-        for symbol, pos in self.positions.items():
-            result.append({
-                "symbol": symbol,
-                "exchange": pos["exchange"],
-                "side": pos["side"],
-                "quantity": pos["quantity"],
-                "avg_price": pos["avg_price"],
-            })
-        return result
+        return [pos.to_dict() for pos in self.positions.values()]
 
     # ------------------------------------------------------------------
     # Portfolio value
@@ -155,17 +186,17 @@ class Portfolio:
         Args:
             current_prices: ``{symbol: current_price}`` for all traded symbols.
         """
+        # Flat portfolio (most bars for intraday strategies) -- nothing to mark
+        if not self.positions:
+            return self.cash
+
+        # SHORT positions (side_sign -1) are a liability to buy back at the
+        # current price: cash already received the sell proceeds, so their
+        # value is the negative of the current buyback cost.
         position_value = 0.0
+        get_price = current_prices.get
         for symbol, pos in self.positions.items():
-            price = current_prices.get(symbol, pos["avg_price"])
-            qty = pos["quantity"]
-            if pos["side"] == "LONG":
-                position_value += price * qty
-            else:
-                # SHORT: liability to buy back at current price.
-                # Cash already received sell proceeds, so position value
-                # is the negative of the current buyback cost.
-                position_value -= price * qty
+            position_value += pos.side_sign * get_price(symbol, pos.avg_price) * pos.quantity
 
         return self.cash + position_value
 
@@ -177,11 +208,25 @@ class Portfolio:
         self, timestamp: datetime, current_prices: dict[str, float]
     ) -> None:
         """Record a snapshot of the portfolio value on the equity curve."""
-        equity = self.get_portfolio_value(current_prices)
-        self.equity_curve.append({
-            "timestamp": timestamp.isoformat() if isinstance(timestamp, datetime) else str(timestamp),
-            "equity": round(equity, 2),
-        })
+        self._equity_timestamps.append(timestamp)
+        self._equity_values.append(round(self.get_portfolio_value(current_prices), 2))
+
+    @property
+    def equity_curve(self) -> list[dict[str, Any]]:
+        """
+        The equity curve as ``[{"timestamp": iso_str, "equity": value}, ...]``.
+
+        Points recorded since the last access are formatted and appended
+        to the cached list, so each snapshot is formatted only once.
+        """
+        curve = self._equity_curve
+        for i in range(len(curve), len(self._equity_values)):
+            ts = self._equity_timestamps[i]
+            curve.append({
+                "timestamp": ts.isoformat() if isinstance(ts, datetime) else str(ts),
+                "equity": self._equity_values[i],
+            })
+        return curve
 
     # ------------------------------------------------------------------
     # Force-close all positions
@@ -203,10 +248,10 @@ class Portfolio:
 
         for symbol in symbols:
             pos = self.positions[symbol]
-            price = current_prices.get(symbol, pos["avg_price"])
+            price = current_prices.get(symbol, pos.avg_price)
 
             # Create a synthetic fill to close
-            if pos["side"] == "LONG":
+            if pos.side == "LONG":
                 close_side = "SELL"
             else:
                 close_side = "BUY"
@@ -214,9 +259,9 @@ class Portfolio:
             fill = FillEvent(
                 timestamp=timestamp,
                 symbol=symbol,
-                exchange=pos["exchange"],
+                exchange=pos.exchange,
                 side=close_side,
-                quantity=pos["quantity"],
+                quantity=pos.quantity,
                 fill_price=price,
                 commission=0.0,  # Simplified -- no commission on forced close
                 order_id=f"CLOSE-{symbol}",
@@ -234,39 +279,29 @@ class Portfolio:
 
     def _open_position(self, fill: FillEvent) -> None:
         """Open a new position from a fill."""
-        side = "LONG" if fill.side.upper() == "BUY" else "SHORT"
-        self.positions[fill.symbol] = {
-            "quantity": fill.quantity,
-            "avg_price": fill.fill_price,
-            "side": side,
-            "exchange": fill.exchange,
-            "total_cost": fill.fill_price * fill.quantity,
-            "entry_timestamp": fill.timestamp,
-            "entry_order_id": fill.order_id,
-        }
+        pos = Position.from_fill(fill, fill.quantity)
+        self.positions[fill.symbol] = pos
         logger.debug(
             "Opened %s position: %s x%d @ %.2f",
-            side, fill.symbol, fill.quantity, fill.fill_price,
+            pos.side, fill.symbol, fill.quantity, fill.fill_price,
         )
 
     def _add_to_position(self, fill: FillEvent) -> None:
         """Add to an existing position in the same direction."""
         pos = self.positions[fill.symbol]
-        old_qty = pos["quantity"]
-        old_cost = pos["total_cost"]
 
         new_cost = fill.fill_price * fill.quantity
-        total_qty = old_qty + fill.quantity
-        total_cost = old_cost + new_cost
+        total_qty = pos.quantity + fill.quantity
+        total_cost = pos.total_cost + new_cost
 
-        pos["quantity"] = total_qty
-        pos["total_cost"] = total_cost
-        pos["avg_price"] = round(total_cost / total_qty, 2)
+        pos.quantity = total_qty
+        pos.total_cost = total_cost
+        pos.avg_price = round(total_cost / total_qty, 2)
 
         logger.debug(
             "Added to %s: %s +%d @ %.2f (avg now %.2f, total %d)",
-            pos["side"], fill.symbol, fill.quantity, fill.fill_price,
-            pos["avg_price"], total_qty,
+            pos.side, fill.symbol, fill.quantity, fill.fill_price,
+            pos.avg_price, total_qty,
         )
 
     def _reduce_position(self, fill: FillEvent) -> Optional[dict]:
@@ -276,19 +311,19 @@ class Portfolio:
         Returns a completed trade dict.
         """
         pos = self.positions[fill.symbol]
-        close_qty = min(fill.quantity, pos["quantity"])
-        remaining_qty = pos["quantity"] - close_qty
+        close_qty = min(fill.quantity, pos.quantity)
+        remaining_qty = pos.quantity - close_qty
         excess_qty = fill.quantity - close_qty
 
         # Calculate P&L for the closed portion
-        if pos["side"] == "LONG":
+        if pos.side == "LONG":
             # Was long, now selling
-            pnl = (fill.fill_price - pos["avg_price"]) * close_qty
+            pnl = (fill.fill_price - pos.avg_price) * close_qty
             # Cash changes: receive sale proceeds minus commission
             self.cash += (fill.fill_price * close_qty) - fill.commission
         else:
             # Was short, now buying to cover
-            pnl = (pos["avg_price"] - fill.fill_price) * close_qty
+            pnl = (pos.avg_price - fill.fill_price) * close_qty
             # Cash changes: pay for covering minus commission
             self.cash -= (fill.fill_price * close_qty) + fill.commission
 
@@ -298,57 +333,49 @@ class Portfolio:
         trade = {
             "symbol": fill.symbol,
             "exchange": fill.exchange,
-            "side": pos["side"],
+            "side": pos.side,
             "quantity": close_qty,
-            "entry_price": pos["avg_price"],
+            "entry_price": pos.avg_price,
             "exit_price": fill.fill_price,
             "pnl": round(pnl, 2),
             "charges": round(fill.commission, 2),
             "net_pnl": round(net_pnl, 2),
             "pnl_percent": round(
-                (pnl / (pos["avg_price"] * close_qty)) * 100, 4
-            ) if pos["avg_price"] * close_qty != 0 else 0.0,
+                (pnl / (pos.avg_price * close_qty)) * 100, 4
+            ) if pos.avg_price * close_qty != 0 else 0.0,
             "entry_at": (
-                pos["entry_timestamp"].isoformat()
-                if isinstance(pos["entry_timestamp"], datetime)
-                else str(pos["entry_timestamp"])
+                pos.entry_timestamp.isoformat()
+                if isinstance(pos.entry_timestamp, datetime)
+                else str(pos.entry_timestamp)
             ),
             "exit_at": (
                 fill.timestamp.isoformat()
                 if isinstance(fill.timestamp, datetime)
                 else str(fill.timestamp)
             ),
-            "entry_order_id": pos.get("entry_order_id", ""),
+            "entry_order_id": pos.entry_order_id,
             "exit_order_id": fill.order_id,
         }
         self.trades.append(trade)
 
         logger.debug(
             "Closed %s %s x%d: entry=%.2f exit=%.2f pnl=%.2f",
-            pos["side"], fill.symbol, close_qty,
-            pos["avg_price"], fill.fill_price, pnl,
+            pos.side, fill.symbol, close_qty,
+            pos.avg_price, fill.fill_price, pnl,
         )
 
         if remaining_qty > 0:
             # Partial close -- reduce the position
-            pos["quantity"] = remaining_qty
-            pos["total_cost"] = pos["avg_price"] * remaining_qty
+            pos.quantity = remaining_qty
+            pos.total_cost = pos.avg_price * remaining_qty
         else:
             # Fully closed
             del self.positions[fill.symbol]
 
         # If there is excess quantity, open a new position in the opposite direction
         if excess_qty > 0:
-            new_side = "LONG" if fill.side.upper() == "BUY" else "SHORT"
-            self.positions[fill.symbol] = {
-                "quantity": excess_qty,
-                "avg_price": fill.fill_price,
-                "side": new_side,
-                "exchange": fill.exchange,
-                "total_cost": fill.fill_price * excess_qty,
-                "entry_timestamp": fill.timestamp,
-                "entry_order_id": fill.order_id,
-            }
+            new_pos = Position.from_fill(fill, excess_qty)
+            self.positions[fill.symbol] = new_pos
             # Adjust cash for the new position portion
             if fill.side.upper() == "BUY":
                 self.cash -= fill.fill_price * excess_qty
@@ -357,7 +384,7 @@ class Portfolio:
 
             logger.debug(
                 "Reversed to %s: %s x%d @ %.2f",
-                new_side, fill.symbol, excess_qty, fill.fill_price,
+                new_pos.side, fill.symbol, excess_qty, fill.fill_price,
             )
 
         return trade
@@ -15,18 +15,27 @@ This module contains two main classes:
 
 from __future__ import annotations
 
+import asyncio
+import builtins
+import hashlib
+import inspect
 import logging
 import traceback
+from collections import deque
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from types import CodeType, ModuleType
 from typing import Any, Callable, Optional
 
+import numpy as np
+import pandas as pd
+
 from app.core.timezone import IST
 
 from app.engine.backtest.data_handler import HistoricalDataHandler
 from app.engine.backtest.execution_handler import SimulatedExecutionHandler
 from app.engine.backtest.metrics import calculate_all_metrics
-from app.engine.backtest.portfolio import Portfolio
+from app.engine.backtest.portfolio import Portfolio, Position
 from app.engine.common.base_runner import BaseRunner
 from app.engine.common.events import FillEvent, OrderEvent
 from app.sdk.context import TradingContext
@@ -34,6 +43,22 @@ from app.sdk.types import FilledOrder, PositionInfo
 
 logger = logging.getLogger(__name__)
 
+# Structured log levels, for filtering against the configured ``log_level``
+_LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+
+# Order types that carry a trigger price, and those that rest across bars
+# until they can be filled (market orders are rejected instead)
+_STOP_ORDER_TYPES = frozenset({"SL", "SL-M"})
+_RESTING_ORDER_TYPES = frozenset({"LIMIT", "SL", "SL-M"})
+
+# on_data() errors logged per exception type before further ones are only counted
+_MAX_LOGGED_ERRORS_PER_TYPE = 5
+
 
 # ======================================================================
 # BacktestContext -- synchronous bridge from strategy to runner
@@ -64,6 +89,14 @@ class BacktestContext(TradingContext):
         super().__init__(params=params)
         self._runner: "BacktestRunner" = runner
 
+        # Current prices memoized per bar (see _current_prices)
+        self._prices_cache_ts: Any = None
+        self._prices_cache: dict[str, float] = {}
+
+        # Current bar timestamp converted to IST, memoized per bar
+        self._ist_cache_ts: Any = None
+        self._ist_cache: Optional[datetime] = None
+
     # ------------------------------------------------------------------
     # Market data
     # ------------------------------------------------------------------
@@ -88,23 +121,50 @@ class BacktestContext(TradingContext):
             symbol = self._runner._instruments[0].get("symbol")
         return self._runner.data_handler.get_current_bar(symbol)
 
+    def _current_prices(self) -> dict[str, float]:
+        """Return current prices for all symbols, built once per bar.
+
+        Prices do not change within a bar, so the dict from
+        ``BacktestRunner._get_all_current_prices`` is reused until the
+        data handler moves on.  The runner resets the cache when a fill
+        opens a position mid-bar (options prices are only merged for held
+        symbols).
+        """
+        ts = self._runner.data_handler.current_timestamp
+        if ts is None or ts is not self._prices_cache_ts:
+            self._prices_cache = self._runner._get_all_current_prices()
+            self._prices_cache_ts = ts
+        return self._prices_cache
+
+    def _bar_ist(self) -> Optional[datetime]:
+        """Return the current bar timestamp in IST (``None`` before the first bar).
+
+        The conversion is done once per bar and reused by the time-lock
+        check and the options helpers.
+        """
+        ts = self._runner.data_handler.current_timestamp
+        if ts is not self._ist_cache_ts:
+            self._ist_cache = _to_ist(ts) if ts else None
+            self._ist_cache_ts = ts
+        return self._ist_cache
+
     # ------------------------------------------------------------------
     # Order management
     # ------------------------------------------------------------------
 
     def _is_time_locked(self) -> bool:
         """Check if the current bar falls within any time lock window (IST)."""
-        locks = getattr(self._runner, "_time_locks", [])
+        locks = self._runner._time_locks
         if not locks:
             return False
         ts = self._runner.data_handler.current_timestamp
         if not ts or not hasattr(ts, "hour"):
             return False
-        # Convert to IST for comparison
-        ts_ist = _to_ist(ts)
-        bar_time = (ts_ist.hour, ts_ist.minute)
-        for (sh, sm), (eh, em) in locks:
-            if (sh, sm) <= bar_time < (eh, em):
+        # Convert to IST minute-of-day for comparison
+        ts_ist = self._bar_ist()
+        bar_minute = ts_ist.hour * 60 + ts_ist.minute
+        for start, end in locks:
+            if start <= bar_minute < end:
                 return True
         return False
 
@@ -127,9 +187,9 @@ class BacktestContext(TradingContext):
         if not oh:
             return None
         if ref_date is None:
-            ts = self._runner.data_handler.current_timestamp
-            if ts:
-                ref_date = _to_ist(ts).date()
+            ts_ist = self._bar_ist()
+            if ts_ist:
+                ref_date = ts_ist.date()
             else:
                 return None
         return oh.get_active_expiry(ref_date)
@@ -141,9 +201,9 @@ class BacktestContext(TradingContext):
             return []
         bar_date = None
         if expiry is None:
-            ts = self._runner.data_handler.current_timestamp
-            if ts:
-                bar_date = _to_ist(ts).date()
+            ts_ist = self._bar_ist()
+            if ts_ist:
+                bar_date = ts_ist.date()
         return oh.get_option_chain(expiry=expiry, bar_date=bar_date)
 
     def get_option_price(self, tradingsymbol: str) -> float | None:
@@ -181,10 +241,9 @@ class BacktestContext(TradingContext):
 
     def get_bar_ist_time(self) -> tuple:
         """Return ``(hour, minute)`` of the current bar in IST."""
-        ts = self._runner.data_handler.current_timestamp
-        if ts is None:
+        ts_ist = self._bar_ist()
+        if ts_ist is None:
             return (0, 0)
-        ts_ist = _to_ist(ts)
         return (ts_ist.hour, ts_ist.minute)
 
     # ------------------------------------------------------------------
@@ -210,8 +269,9 @@ class BacktestContext(TradingContext):
         Returns a unique order-id string.
         """
         if self._is_time_locked():
-            ts = self._runner.data_handler.current_timestamp
-            self._runner._add_log("WARNING", f"BUY {symbol} blocked — time lock active at {ts.strftime('%H:%M') if ts else '?'}", "runner")
+            if self._runner._log_enabled("WARNING"):
+                ts = self._runner.data_handler.current_timestamp
+                self._runner._add_log("WARNING", f"BUY {symbol} blocked — time lock active at {ts.strftime('%H:%M') if ts else '?'}", "runner")
             return ""
         return self._place_order(symbol, quantity, "BUY", order_type, price, exchange, product)
 
@@ -230,8 +290,9 @@ class BacktestContext(TradingContext):
         Returns a unique order-id string.
         """
         if self._is_time_locked():
-            ts = self._runner.data_handler.current_timestamp
-            self._runner._add_log("WARNING", f"SELL {symbol} blocked — time lock active at {ts.strftime('%H:%M') if ts else '?'}", "runner")
+            if self._runner._log_enabled("WARNING"):
+                ts = self._runner.data_handler.current_timestamp
+                self._runner._add_log("WARNING", f"SELL {symbol} blocked — time lock active at {ts.strftime('%H:%M') if ts else '?'}", "runner")
             return ""
         return self._place_order(symbol, quantity, "SELL", order_type, price, exchange, product)
 
@@ -246,60 +307,141 @@ class BacktestContext(TradingContext):
         product: str = "MIS",
     ) -> str:
         """Internal: queue an order event."""
-        order_id = f"BT-{self._runner.backtest_id[:8]}-{len(self._runner._order_queue)}"
+        runner = self._runner
+        seq = runner._next_order_seq
+        runner._next_order_seq = seq + 1
+        order_id = f"{runner._order_id_prefix}{seq}"
+
+        # Order types are usually passed upper-case already ("MARKET" by
+        # default), so only allocate a new string when needed
+        if not order_type.isupper():
+            order_type = order_type.upper()
+        trigger_price = price if order_type in _STOP_ORDER_TYPES else None
 
         order = OrderEvent(
-            timestamp=self._runner.data_handler.current_timestamp or datetime.now(timezone.utc),
+            timestamp=runner.data_handler.current_timestamp or datetime.now(timezone.utc),
             symbol=symbol,
             exchange=exchange,
             side=side,
             quantity=quantity,
-            order_type=order_type.upper(),
+            order_type=order_type,
             order_id=order_id,
             price=price,
-            trigger_price=price if order_type.upper() in ("SL", "SL-M") else None,
+            trigger_price=trigger_price,
             product=product,
             status="pending",
         )
 
-        self._runner._order_queue.append(order)
-        self._runner.portfolio.orders.append({
-            "order_id": order_id,
-            "symbol": symbol,
-            "exchange": exchange,
-            "side": side,
-            "quantity": quantity,
-            "order_type": order_type,
-            "price": price,
-            "product": product,
-            "status": "pending",
-            "timestamp": order.timestamp.isoformat()
-            if isinstance(order.timestamp, datetime)
-            else str(order.timestamp),
-        })
-
-        self._runner._add_log("INFO", f"{side} order queued: {symbol} x{quantity} @ {price or 'MARKET'} ({order_type})", "strategy")
-        logger.debug("%s order queued: %s x%d @ %s (%s)", side, symbol, quantity, price or "MARKET", order_id)
+        runner._order_queue.append(order)
+        runner._order_index[order_id] = order
+        runner._open_orders_cache = None
+        runner.portfolio.orders.append(order)
+
+        runner._add_log(
+            "INFO", "%s order queued: %s x%s @ %s (%s)", "strategy",
+            side, symbol, quantity, price or "MARKET", order_type,
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s order queued: %s x%d @ %s (%s)", side, symbol, quantity, price or "MARKET", order_id)
         return order_id
 
+    def buy_many(
+        self,
+        symbols: list[str],
+        quantities: list[int],
+        exchange: str = "NSE",
+        product: str = "MIS",
+    ) -> list[str]:
+        """Place a BUY MARKET order for each symbol in one batch."""
+        return self._place_market_orders(symbols, quantities, "BUY", exchange, product)
+
+    def sell_many(
+        self,
+        symbols: list[str],
+        quantities: list[int],
+        exchange: str = "NSE",
+        product: str = "MIS",
+    ) -> list[str]:
+        """Place a SELL MARKET order for each symbol in one batch."""
+        return self._place_market_orders(symbols, quantities, "SELL", exchange, product)
+
+    def _place_market_orders(
+        self,
+        symbols: list[str],
+        quantities: list[int],
+        side: str,
+        exchange: str,
+        product: str,
+    ) -> list[str]:
+        """Internal: queue a basket of MARKET orders.
+
+        The time-lock check, timestamp, id counter and log entry are handled
+        once for the whole basket instead of once per order.  As with
+        ``buy()``/``sell()``, quantities are passed through unvalidated;
+        a blocked basket returns one ``""`` per symbol.
+        """
+        if len(symbols) != len(quantities):
+            raise ValueError("symbols and quantities must have the same length")
+        if not symbols:
+            return []
+
+        runner = self._runner
+        if self._is_time_locked():
+            if runner._log_enabled("WARNING"):
+                ts = runner.data_handler.current_timestamp
+                runner._add_log(
+                    "WARNING", "%s basket of %d blocked — time lock active at %s", "runner",
+                    side, len(symbols), ts.strftime("%H:%M") if ts else "?",
+                )
+            return [""] * len(symbols)
+
+        timestamp = runner.data_handler.current_timestamp or datetime.now(timezone.utc)
+        prefix = runner._order_id_prefix
+        seq = runner._next_order_seq
+        orders = [
+            OrderEvent(
+                timestamp=timestamp,
+                symbol=symbol,
+                exchange=exchange,
+                side=side,
+                quantity=quantity,
+                order_type="MARKET",
+                order_id=f"{prefix}{seq + i}",
+                product=product,
+                status="pending",
+            )
+            for i, (symbol, quantity) in enumerate(zip(symbols, quantities))
+        ]
+        runner._next_order_seq = seq + len(orders)
+
+        runner._order_queue.extend(orders)
+        runner._order_index.update((o.order_id, o) for o in orders)
+        runner.portfolio.orders.extend(orders)
+        runner._open_orders_cache = None
+
+        if runner._log_enabled("INFO"):
+            runner._add_log(
+                "INFO", "%s basket queued: %s @ MARKET", "strategy",
+                side, ", ".join(f"{o.symbol} x{o.quantity}" for o in orders),
+            )
+        return [o.order_id for o in orders]
+
     def cancel_order(self, order_id: str) -> bool:
         """
-        Cancel a pending order by removing it from the queue.
+        Cancel a pending order.
 
         Returns ``True`` if the order was found and cancelled.
         """
-        for i, order in enumerate(self._runner._order_queue):
-            if order.order_id == order_id and order.status == "pending":
-                order.status = "cancelled"
-                self._runner._order_queue.pop(i)
-                # Update the order record
-                for rec in self._runner.portfolio.orders:
-                    if rec["order_id"] == order_id:
-                        rec["status"] = "cancelled"
-                        break
-                logger.debug("Order cancelled: %s", order_id)
-                return True
-        return False
+        order = self._runner._order_index.get(order_id)
+        if order is None or order.status != "pending":
+            return False
+        # Flag only -- the runner drops cancelled orders from its queues
+        # once per bar in _stage_new_orders
+        order.status = "cancelled"
+        self._runner._has_cancelled_orders = True
+        self._runner._open_orders_cache = None
+        logger.debug("Order cancelled: %s", order_id)
+        return True
 
     # ------------------------------------------------------------------
     # Position & portfolio queries
@@ -307,68 +449,23 @@ class BacktestContext(TradingContext):
 
     def get_positions(self) -> list[PositionInfo]:
         """Return all open positions as PositionInfo instances."""
-        positions = self._runner.portfolio.get_all_positions()
-        current_prices = self._runner._get_all_current_prices()
-
-        result = []
-        for pos in positions:
-            symbol = pos["symbol"]
-            current_price = current_prices.get(symbol, pos["avg_price"])
-            qty = pos["quantity"]
-            avg_price = pos["avg_price"]
-
-            if pos["side"] == "LONG":
-                unrealized = (current_price - avg_price) * qty
-            else:
-                unrealized = (avg_price - current_price) * qty
-
-            pnl_pct = (unrealized / (avg_price * qty) * 100) if avg_price * qty != 0 else 0.0
-
-            result.append(PositionInfo(
-                symbol=symbol,
-                exchange=pos["exchange"],
-                side=pos["side"],
-                quantity=qty,
-                average_entry_price=avg_price,
-                current_price=current_price,
-                unrealized_pnl=round(unrealized, 2),
-                pnl_percent=round(pnl_pct, 4),
-            ))
-
-        return result
+        current_prices = self._current_prices()
+        return [
+            _position_info(pos, current_prices.get(symbol, pos.avg_price))
+            for symbol, pos in self._runner.portfolio.positions.items()
+        ]
 
     def get_position(self, symbol: str) -> PositionInfo | None:
         """Return the position for *symbol*, or ``None`` if flat."""
-        pos = self._runner.portfolio.get_position(symbol)
+        pos = self._runner.portfolio.positions.get(symbol)
         if pos is None:
             return None
-
-        current_prices = self._runner._get_all_current_prices()
-        current_price = current_prices.get(symbol, pos["avg_price"])
-        qty = pos["quantity"]
-        avg_price = pos["avg_price"]
-
-        if pos["side"] == "LONG":
-            unrealized = (current_price - avg_price) * qty
-        else:
-            unrealized = (avg_price - current_price) * qty
-
-        pnl_pct = (unrealized / (avg_price * qty) * 100) if avg_price * qty != 0 else 0.0
-
-        return PositionInfo(
-            symbol=symbol,
-            exchange=pos["exchange"],
-            side=pos["side"],
-            quantity=qty,
-            average_entry_price=avg_price,
-            current_price=current_price,
-            unrealized_pnl=round(unrealized, 2),
-            pnl_percent=round(pnl_pct, 4),
-        )
+        current_price = self._current_prices().get(symbol, pos.avg_price)
+        return _position_info(pos, current_price)
 
     def get_portfolio_value(self) -> float:
         """Return total portfolio value (cash + positions at market)."""
-        current_prices = self._runner._get_all_current_prices()
+        current_prices = self._current_prices()
         return self._runner.portfolio.get_portfolio_value(current_prices)
 
     def get_cash(self) -> float:
@@ -376,21 +473,31 @@ class BacktestContext(TradingContext):
         return self._runner.portfolio.cash
 
     def get_open_orders(self) -> list:
-        """Return currently pending orders."""
-        return [
-            {
-                "order_id": o.order_id,
-                "symbol": o.symbol,
-                "exchange": o.exchange,
-                "side": o.side,
-                "quantity": o.quantity,
-                "order_type": o.order_type,
-                "price": o.price,
-                "status": o.status,
-            }
-            for o in self._runner._order_queue
-            if o.status == "pending"
-        ]
+        """Return currently pending orders.
+
+        Covers both orders resting from earlier bars and orders placed on
+        this bar, i.e. everything ``cancel_order()`` can reach.  The dicts
+        are built once and reused until an order is placed, cancelled,
+        staged or processed (see ``BacktestRunner._open_orders_cache``).
+        """
+        runner = self._runner
+        if runner._open_orders_cache is None:
+            runner._open_orders_cache = [
+                {
+                    "order_id": o.order_id,
+                    "symbol": o.symbol,
+                    "exchange": o.exchange,
+                    "side": o.side,
+                    "quantity": o.quantity,
+                    "order_type": o.order_type,
+                    "price": o.price,
+                    "status": o.status,
+                }
+                for queue in (runner._pending_orders, runner._order_queue)
+                for o in queue
+                if o.status == "pending"
+            ]
+        return list(runner._open_orders_cache)
 
 
 # ======================================================================
@@ -406,7 +513,9 @@ class BacktestRunner(BaseRunner):
         2. Call :meth:`run` with OHLCV data.
         3. Receive results dict.
 
-    The runner is single-use: create a new instance for each backtest.
+    A runner holds the state of one run.  To run the same strategy again
+    (e.g. a parameter sweep), call :meth:`reset` between runs instead of
+    constructing a new runner.
 
     Args:
         backtest_id: Unique identifier for this backtest run.
@@ -421,6 +530,9 @@ class BacktestRunner(BaseRunner):
             - ``parameters``: Strategy parameter dict to pass to on_init.
             - ``slippage_percent``: Optional, default 0.05.
             - ``fill_at``: Optional, ``"next_open"`` or ``"current_close"``.
+            - ``log_level``: Optional, minimum level (``"INFO"``,
+              ``"WARNING"``, ...) of entries kept in the run logs.
+              Default ``"INFO"``.
     """
 
     def __init__(
@@ -443,39 +555,125 @@ class BacktestRunner(BaseRunner):
             commission_type=config.get("commission_type", "zerodha"),
             flat_commission=config.get("flat_commission", 0.0),
         )
-        self.portfolio = Portfolio(float(config.get("initial_capital", 100000)))
 
         # Options handler (None when options_mode is off)
         self.options_handler = options_handler
 
+        self._log_level = _LOG_LEVELS.get(
+            str(config.get("log_level", "INFO")).upper(), logging.INFO,
+        )
+
+        # Order ids are "BT-<backtest id[:8]>-<seq>".  The sequence is not
+        # restarted by reset(), so ids stay unique across reruns.
+        self._order_id_prefix = f"BT-{backtest_id[:8]}-"
+        self._next_order_seq = 0
+
+        self._init_run_state()
+
+    def reset(self, parameters: Optional[dict] = None) -> None:
+        """
+        Discard the state of the previous run so :meth:`run` can be called
+        again, optionally with new strategy *parameters*.
+
+        Results dicts returned by earlier runs are left intact: the run
+        state is replaced with fresh containers rather than cleared.  The
+        caller's config dict is not modified.
+        """
+        if parameters is not None:
+            self._config = {**self._config, "parameters": dict(parameters)}
+        self._init_run_state()
+
+    def _init_run_state(self) -> None:
+        """Create the per-run portfolio, order queues and logs."""
+        self.portfolio = Portfolio(float(self._config.get("initial_capital", 100000)))
+
         # Strategy
         self._strategy_instance: Any = None
         self._context: Optional[BacktestContext] = None
 
         # Order queue (populated by context.buy()/sell(), consumed by runner)
-        self._order_queue: list[OrderEvent] = []
+        self._order_queue: deque[OrderEvent] = deque()
 
         # Pending orders that could not be filled and carry forward
-        self._pending_orders: list[OrderEvent] = []
+        self._pending_orders: deque[OrderEvent] = deque()
+
+        # Set by cancel_order(); cancelled orders stay in the queues until
+        # the next _stage_new_orders()
+        self._has_cancelled_orders = False
+
+        # get_open_orders() result, rebuilt after the order queue changes
+        self._open_orders_cache: Optional[list[dict]] = None
 
-        # Structured logs collected during the run
+        # Parsed from the ``time_locks`` parameter at the start of run()
+        self._time_locks: list[tuple[int, int]] = []
+
+        # Every order placed during the run, and the fill of each completed
+        # one, keyed by order id
+        self._order_index: dict[str, OrderEvent] = {}
+        self._order_fills: dict[str, FillEvent] = {}
+
+        # Structured logs collected during the run.  Entries are buffered
+        # as (level, source, message) for the current bar and moved into
+        # ``_logs`` by _flush_logs(), which stamps them all at once.
+        # Strategy log calls with a plain string message store the raw
+        # LogRecord; it is only formatted by _materialize_logs() when results
+        # are returned.  Calls with %-args are formatted as they are logged.
         self._logs: list[dict] = []
+        self._log_buffer: list[tuple[str, str, str | logging.LogRecord]] = []
+
+        # on_data() error counts keyed by exception type name
+        self._on_data_error_counts: dict[str, int] = {}
 
     # ------------------------------------------------------------------
     # Structured logging helper
     # ------------------------------------------------------------------
 
-    def _add_log(self, level: str, message: str, source: str = "system"):
-        """Append a structured log entry."""
-        ts = None
-        if self.data_handler:
-            ts = self.data_handler.current_timestamp
-        self._logs.append({
-            "level": level,
-            "source": source,
-            "message": message,
-            "timestamp": ts.isoformat() if isinstance(ts, datetime) else None,
-        })
+    def _add_log(self, level: str, message: str, source: str = "system", *args: Any):
+        """Append a structured log entry.
+
+        Like ``logging``, *message* may hold ``%``-style placeholders for
+        *args*; they are only formatted when *level* passes ``log_level``.
+        """
+        if _LOG_LEVELS.get(level, logging.INFO) < self._log_level:
+            return
+        if args:
+            message = message % args
+        self._log_buffer.append((level, source, message))
+
+    def _log_enabled(self, level: str) -> bool:
+        """Whether ``_add_log`` would keep an entry at *level*.
+
+        For guarding messages whose arguments are costly to build.
+        """
+        return _LOG_LEVELS.get(level, logging.INFO) >= self._log_level
+
+    def _flush_logs(self) -> None:
+        """Move buffered log entries into ``_logs``, stamped with the current bar.
+
+        Called at the end of every bar (and before ``_logs`` is returned),
+        so every buffered entry belongs to the bar being stamped and the
+        timestamp is formatted once per bar rather than once per entry.
+        """
+        if not self._log_buffer:
+            return
+        ts = self.data_handler.current_timestamp if self.data_handler else None
+        ts_str = ts.isoformat() if isinstance(ts, datetime) else None
+        self._logs.extend(
+            {"level": level, "source": source, "message": message, "timestamp": ts_str}
+            for level, source, message in self._log_buffer
+        )
+        self._log_buffer.clear()
+
+    def _materialize_logs(self) -> list[dict]:
+        """Format any deferred strategy LogRecords in ``_logs`` and return it."""
+        for entry in self._logs:
+            record = entry["message"]
+            if isinstance(record, logging.LogRecord):
+                try:
+                    entry["message"] = _STRATEGY_LOG_FORMATTER.format(record)
+                except Exception:
+                    entry["message"] = str(record.msg)
+        return self._logs
 
     # ------------------------------------------------------------------
     # BaseRunner interface (async wrappers)
@@ -534,15 +732,24 @@ class BacktestRunner(BaseRunner):
         from the options handler.  This ensures portfolio valuation and
         position closing use the correct mark-to-market prices.
         """
-        prices = self.data_handler.get_current_prices() if self.data_handler else {}
-        if self.options_handler and self.data_handler:
+        if not self.data_handler:
+            return {}
+        # The data handler's dict is shared for the whole bar and is only
+        # read by callers, so it is copied only when option prices are added
+        prices = self.data_handler.get_current_prices()
+        if self.options_handler:
             ts = self.data_handler.current_timestamp
             if ts:
-                for symbol in list(self.portfolio.positions.keys()):
+                merged = None
+                for symbol in self.portfolio.positions:
                     if symbol not in prices:
                         bar = self.options_handler.get_option_bar(symbol, ts)
                         if bar and "close" in bar:
-                            prices[symbol] = float(bar["close"])
+                            if merged is None:
+                                merged = dict(prices)
+                            merged[symbol] = float(bar["close"])
+                if merged is not None:
+                    return merged
         return prices
 
     # ------------------------------------------------------------------
@@ -577,6 +784,7 @@ class BacktestRunner(BaseRunner):
         except Exception as exc:
             logger.exception("Backtest %s failed: %s", self.backtest_id, exc)
             self._add_log("ERROR", f"Backtest failed: {type(exc).__name__}: {exc}", "runner")
+            self._flush_logs()
             return {
                 "status": "failed",
                 "error": f"{type(exc).__name__}: {exc}",
@@ -584,8 +792,8 @@ class BacktestRunner(BaseRunner):
                 "metrics": {},
                 "equity_curve": self.portfolio.equity_curve,
                 "trades": self.portfolio.trades,
-                "orders": self.portfolio.orders,
-                "logs": self._logs,
+                "orders": self._order_records(),
+                "logs": self._materialize_logs(),
             }
 
     async def _run_internal(
@@ -612,13 +820,14 @@ class BacktestRunner(BaseRunner):
         total_bars = self.data_handler.total_bars
         if total_bars == 0:
             self._add_log("WARNING", "No data available for the specified instruments and date range.", "runner")
+            self._flush_logs()
             return {
                 "status": "completed",
                 "metrics": {},
                 "equity_curve": [],
                 "trades": [],
                 "orders": [],
-                "logs": self._logs,
+                "logs": self._materialize_logs(),
                 "warning": "No OHLCV data found",
             }
 
@@ -628,19 +837,20 @@ class BacktestRunner(BaseRunner):
         params = self._config.get("parameters", {})
         self._context = BacktestContext(runner=self, params=params)
 
-        instruments_str = ", ".join(
-            i.get("symbol", i) if isinstance(i, dict) else str(i) for i in self._instruments
-        )
-        self._add_log("INFO", f"Backtest started — {total_bars} bars, instruments: {instruments_str}, "
-                       f"capital: {self._config.get('initial_capital', 100000)}, "
-                       f"timeframe: {self._config.get('timeframe', '1d')}", "runner")
+        if self._log_enabled("INFO"):
+            instruments_str = ", ".join(
+                i.get("symbol", i) if isinstance(i, dict) else str(i) for i in self._instruments
+            )
+            self._add_log("INFO", f"Backtest started — {total_bars} bars, instruments: {instruments_str}, "
+                           f"capital: {self._config.get('initial_capital', 100000)}, "
+                           f"timeframe: {self._config.get('timeframe', '1d')}", "runner")
 
-        if self.options_handler:
-            self._add_log("INFO", f"Options data loaded for {self.options_handler.underlying_name} "
-                          f"({len(self.options_handler._expiry_dates)} expiries)", "runner")
+            if self.options_handler:
+                self._add_log("INFO", f"Options data loaded for {self.options_handler.underlying_name} "
+                              f"({len(self.options_handler._expiry_dates)} expiries)", "runner")
 
         # Capture log messages from the strategy (print() and ctx.log())
-        log_handler = _ListLogHandler(self._logs, data_handler=self.data_handler)
+        log_handler = _ListLogHandler(self._log_buffer)
         self._context._logger.addHandler(log_handler)
         self._context._logger.setLevel(logging.DEBUG)
 
@@ -658,11 +868,13 @@ class BacktestRunner(BaseRunner):
         # 5. Main event loop: iterate over bars
         # ----------------------------------------------------------
         progress_interval = max(1, total_bars // 100)  # report ~100 times
+        # Coroutine callbacks are known up front; anything else is checked
+        # per call in case a plain callable hands back an awaitable
+        callback_is_async = inspect.iscoroutinefunction(progress_callback)
 
         # Intraday EOD square-off config
         timeframe = self._config.get("timeframe", "1d")
         is_intraday_tf = timeframe not in ("1d", "1D", "day", "1w", "1W", "week")
-        _last_eod_date = None  # track which day we already squared off
 
         # Parse EOD square-off time from parameters (default 15:10)
         eod_time_str = params.get("eod_square_off_time", "")
@@ -672,28 +884,36 @@ class BacktestRunner(BaseRunner):
                 eod_time = (h, m)
             except (ValueError, AttributeError):
                 eod_time = (15, 10)
-            self._add_log("INFO", f"EOD square-off enabled at {eod_time_str}", "runner")
+            self._add_log("INFO", "EOD square-off enabled at %s", "runner", eod_time_str)
         elif is_intraday_tf:
             eod_time = None  # disabled when empty string
         else:
             eod_time = None
 
-        # Parse time locks from parameters
+        # Parse time locks from parameters as (start, end) IST minutes of day
         raw_time_locks = params.get("time_locks", [])
-        time_locks: list[tuple[tuple[int, int], tuple[int, int]]] = []
+        time_locks: list[tuple[int, int]] = []
         for lock in raw_time_locks:
             try:
                 sh, sm = map(int, lock["start"].split(":"))
                 eh, em = map(int, lock["end"].split(":"))
-                time_locks.append(((sh, sm), (eh, em)))
+                time_locks.append((sh * 60 + sm, eh * 60 + em))
             except (ValueError, KeyError, AttributeError):
                 continue
-        if time_locks and is_intraday_tf:
+        if time_locks and is_intraday_tf and self._log_enabled("INFO"):
             locks_str = ", ".join(f"{l['start']}-{l['end']}" for l in raw_time_locks if "start" in l and "end" in l)
             self._add_log("INFO", f"Time locks active: {locks_str}", "runner")
         self._time_locks = time_locks if is_intraday_tf else []
+        self._flush_logs()
 
-        for bar_index, (timestamp, bar_data) in enumerate(self.data_handler):
+        # Bars on which the EOD square-off fires, worked out for the whole
+        # run up front instead of converting every bar to IST in the loop
+        eod_mask = (
+            _eod_trigger_mask(self.data_handler.as_arrays()[0], eod_time[0] * 60 + eod_time[1])
+            if eod_time else None
+        )
+
+        for bar_index, timestamp in enumerate(self.data_handler.iter_timestamps()):
 
             # 5a. Process pending orders from the *previous* bar
             #     (orders placed during previous on_data get filled now)
@@ -703,14 +923,20 @@ class BacktestRunner(BaseRunner):
             try:
                 strategy_instance.on_data(self._context)
             except Exception as exc:
-                self._add_log(
-                    "ERROR",
-                    f"on_data raised at bar {bar_index} ({timestamp}): {type(exc).__name__}: {exc}",
-                    "strategy",
-                )
-                logger.warning(
-                    "Strategy on_data error at bar %d: %s", bar_index, exc,
-                )
+                # Only the first few errors of each type are logged; a bug
+                # that fires on every bar would otherwise flood the logs
+                err_type = type(exc).__name__
+                err_count = self._on_data_error_counts.get(err_type, 0)
+                self._on_data_error_counts[err_type] = err_count + 1
+                if err_count < _MAX_LOGGED_ERRORS_PER_TYPE:
+                    self._add_log(
+                        "ERROR",
+                        f"on_data raised at bar {bar_index} ({timestamp}): {err_type}: {exc}",
+                        "strategy",
+                    )
+                    logger.warning(
+                        "Strategy on_data error at bar %d: %s", bar_index, exc,
+                    )
                 # Continue -- don't abort the entire backtest for a single bar error
 
             # 5c. Move newly placed orders to pending queue for next-bar execution
@@ -718,65 +944,71 @@ class BacktestRunner(BaseRunner):
 
             # 5d. Intraday EOD square-off (AFTER strategy has had its chance
             #     to exit, so we don't conflict with strategy-managed exits)
-            if eod_time and hasattr(timestamp, "hour"):
-                ts_ist = _to_ist(timestamp)
-                bar_time = (ts_ist.hour, ts_ist.minute)
-                bar_date = ts_ist.date()
-                if bar_time >= eod_time and bar_date != _last_eod_date:
-                    if self.portfolio.positions:
-                        prices = self._get_all_current_prices()
-                        closed = self.portfolio.close_all_positions(prices, timestamp)
-                        _last_eod_date = bar_date
-                        for pos in closed:
-                            sym = pos.get("symbol", "?")
-                            pnl = pos.get("pnl", 0)
-                            self._add_log(
-                                "INFO",
-                                f"EOD square-off: closed {sym} at {eod_time_str or '15:10'} — P&L: {pnl:.2f}",
-                                "runner",
+            if eod_mask is not None and eod_mask[bar_index]:
+                if self.portfolio.positions:
+                    prices = self._get_all_current_prices()
+                    closed = self.portfolio.close_all_positions(prices, timestamp)
+                    for pos in closed:
+                        sym = pos.get("symbol", "?")
+                        pnl = pos.get("pnl", 0)
+                        self._add_log(
+                            "INFO", "EOD square-off: closed %s at %s — P&L: %.2f", "runner",
+                            sym, eod_time_str or "15:10", pnl,
+                        )
+                        # Notify strategy of forced close
+                        try:
+                            close_side = "BUY" if pos.get("side") == "SHORT" else "SELL"
+                            filled = FilledOrder(
+                                order_id=f"EOD-{sym}",
+                                symbol=sym,
+                                exchange=pos.get("exchange", "NFO"),
+                                side=close_side,
+                                quantity=int(pos.get("quantity", 0)),
+                                fill_price=float(pos.get("exit_price", 0)),
+                                timestamp=timestamp,
                             )
-                            # Notify strategy of forced close
-                            try:
-                                close_side = "BUY" if pos.get("side") == "SHORT" else "SELL"
-                                filled = FilledOrder(
-                                    order_id=f"EOD-{sym}",
-                                    symbol=sym,
-                                    exchange=pos.get("exchange", "NFO"),
-                                    side=close_side,
-                                    quantity=int(pos.get("quantity", 0)),
-                                    fill_price=float(pos.get("exit_price", 0)),
-                                    timestamp=timestamp,
-                                )
-                                self._strategy_instance.on_order_fill(self._context, filled)
-                            except Exception as exc:
-                                self._add_log("ERROR", f"EOD on_order_fill raised: {exc}", "strategy")
-                    else:
-                        if bar_date != _last_eod_date:
-                            _last_eod_date = bar_date
-                    # Cancel ALL pending orders (strategy exits are now redundant)
-                    if self._pending_orders:
-                        self._add_log("INFO", f"EOD: cancelled {len(self._pending_orders)} pending order(s)", "runner")
-                        self._pending_orders.clear()
-
-            # 5e. Record equity curve point (include options prices for correct MTM)
-            current_prices = self._get_all_current_prices()
-            self.portfolio.record_equity(timestamp, current_prices)
+                            self._strategy_instance.on_order_fill(self._context, filled)
+                        except Exception as exc:
+                            self._add_log("ERROR", f"EOD on_order_fill raised: {exc}", "strategy")
+                # Cancel ALL pending orders (strategy exits are now redundant)
+                if self._pending_orders:
+                    self._add_log("INFO", "EOD: cancelled %d pending order(s)", "runner", len(self._pending_orders))
+                    self._pending_orders.clear()
+                    self._open_orders_cache = None
+
+            # 5e. Record equity curve point (include options prices for correct
+            #     MTM).  A flat portfolio is worth its cash, so skip building
+            #     the price map on bars with nothing to mark.
+            if self.portfolio.positions:
+                self.portfolio.record_equity(timestamp, self._get_all_current_prices())
+            else:
+                self.portfolio.record_equity(timestamp, {})
+            self._flush_logs()
 
             # 5f. Progress callback
             if progress_callback and (bar_index % progress_interval == 0 or bar_index == total_bars - 1):
                 result = progress_callback(bar_index + 1, total_bars)
                 # Support async callbacks
-                if hasattr(result, "__await__"):
+                if callback_is_async or inspect.isawaitable(result):
                     await result
 
+        for err_type, count in self._on_data_error_counts.items():
+            if count > _MAX_LOGGED_ERRORS_PER_TYPE:
+                self._add_log(
+                    "ERROR",
+                    f"on_data raised {count} {err_type} errors in total — "
+                    f"suppressed {count - _MAX_LOGGED_ERRORS_PER_TYPE} further",
+                    "strategy",
+                )
+
         # ----------------------------------------------------------
         # 6. Process any remaining pending orders before force-close
         # ----------------------------------------------------------
         if self._pending_orders:
             self._add_log(
                 "INFO",
-                f"Processing {len(self._pending_orders)} pending order(s) before force-close",
-                "runner",
+                "Processing %d pending order(s) before force-close", "runner",
+                len(self._pending_orders),
             )
             self._process_pending_orders(total_bars - 1)
 
@@ -790,7 +1022,7 @@ class BacktestRunner(BaseRunner):
             for pos in closed:
                 symbol = pos.get("symbol", "?")
                 pnl = pos.get("pnl", 0)
-                self._add_log("INFO", f"Force-closed position {symbol} at end of backtest — P&L: {pnl:.2f}", "runner")
+                self._add_log("INFO", "Force-closed position %s at end of backtest — P&L: %.2f", "runner", symbol, pnl)
             logger.info(
                 "Force-closed %d positions at end of backtest", len(closed),
             )
@@ -799,26 +1031,37 @@ class BacktestRunner(BaseRunner):
         self.portfolio.record_equity(final_ts, final_prices)
 
         # ----------------------------------------------------------
-        # 8. Call strategy.on_stop()
-        # ----------------------------------------------------------
-        try:
-            strategy_instance.on_stop(self._context)
-            self._add_log("INFO", "Strategy on_stop() completed", "runner")
-        except Exception as exc:
-            self._add_log("ERROR", f"on_stop raised: {type(exc).__name__}: {exc}", "strategy")
-
-        # ----------------------------------------------------------
-        # 9. Calculate metrics
+        # 8. Calculate metrics in a worker thread while on_stop() runs.
+        #    The equity curve and trades are final at this point.  The
+        #    thread gets its own copy of each trade dict, since on_stop()
+        #    can reach and mutate the portfolio's trades; the equity list
+        #    is copied too, but its points are only written by
+        #    record_equity(), which on_stop() does not call.
         # ----------------------------------------------------------
         start_date = self._config.get("start_date", datetime.now(timezone.utc))
         end_date = self._config.get("end_date", datetime.now(timezone.utc))
 
-        metrics = calculate_all_metrics(
-            equity_curve=self.portfolio.equity_curve,
-            trades=self.portfolio.trades,
+        metrics_task = asyncio.create_task(asyncio.to_thread(
+            calculate_all_metrics,
+            equity_curve=list(self.portfolio.equity_curve),
+            trades=[dict(t) for t in self.portfolio.trades],
             start_date=start_date,
             end_date=end_date,
-        )
+        ))
+
+        # ----------------------------------------------------------
+        # 9. Call strategy.on_stop()
+        # ----------------------------------------------------------
+        # The metrics task is awaited even if on_stop() raises something
+        # other than an Exception (e.g. CancelledError)
+        try:
+            try:
+                strategy_instance.on_stop(self._context)
+                self._add_log("INFO", "Strategy on_stop() completed", "runner")
+            except Exception as exc:
+                self._add_log("ERROR", f"on_stop raised: {type(exc).__name__}: {exc}", "strategy")
+        finally:
+            metrics = await metrics_task
 
         # Summary log
         total_trades = metrics.get("total_trades", 0)
@@ -827,14 +1070,14 @@ class BacktestRunner(BaseRunner):
         max_dd = metrics.get("max_drawdown", 0)
         self._add_log(
             "INFO",
-            f"Backtest completed — {total_trades} trades, "
-            f"return: {total_ret * 100:.2f}%, Sharpe: {sharpe:.2f}, "
-            f"max DD: {max_dd * 100:.2f}%",
+            "Backtest completed — %s trades, return: %.2f%%, Sharpe: %.2f, max DD: %.2f%%",
             "runner",
+            total_trades, total_ret * 100, sharpe, max_dd * 100,
         )
 
         # Clean up log handler
         self._context._logger.removeHandler(log_handler)
+        self._flush_logs()
 
         return {
             "status": "completed",
@@ -842,14 +1085,43 @@ class BacktestRunner(BaseRunner):
             "equity_curve": self.portfolio.equity_curve,
             "drawdown_curve": metrics.get("drawdown_curve", []),
             "trades": self.portfolio.trades,
-            "orders": self.portfolio.orders,
+            "orders": self._order_records(),
             "total_charges": round(self.portfolio.total_charges, 2),
             "final_capital": round(
                 self.portfolio.get_portfolio_value(final_prices), 2,
             ),
-            "logs": self._logs,
+            "logs": self._materialize_logs(),
         }
 
+    def _order_records(self) -> list[dict]:
+        """Serialize every order placed during the run for the results dict.
+
+        ``portfolio.orders`` holds the live ``OrderEvent`` objects, so
+        status changes never need a separate record to be kept in sync;
+        dicts are only built here, once, at the end of the run.
+        """
+        records = []
+        for order in self.portfolio.orders:
+            ts = order.timestamp
+            record = {
+                "order_id": order.order_id,
+                "symbol": order.symbol,
+                "exchange": order.exchange,
+                "side": order.side,
+                "quantity": order.quantity,
+                "order_type": order.order_type,
+                "price": order.price,
+                "product": order.product,
+                "status": order.status,
+                "timestamp": ts.isoformat() if isinstance(ts, datetime) else str(ts),
+            }
+            fill = self._order_fills.get(order.order_id)
+            if fill is not None:
+                record["fill_price"] = fill.fill_price
+                record["commission"] = fill.commission
+            records.append(record)
+        return records
+
     # ------------------------------------------------------------------
     # Strategy loading
     # ------------------------------------------------------------------
@@ -863,82 +1135,34 @@ class BacktestRunner(BaseRunner):
           - ``TradingContext``
           - Common builtins (math, datetime, etc.)
 
-        The *last* class found that extends ``Strategy`` is instantiated.
+        The *last* class defined that extends ``Strategy`` is instantiated.
         """
-        from app.sdk.strategy_base import Strategy
+        from app.sdk.strategy_base import Strategy, _defined_subclasses
 
-        # Build a safe namespace
+        # Per-run namespace: a copy of the shared builtins template with
+        # ``print`` bound to this runner's log
+        builtins_ns = dict(_STRATEGY_BUILTINS)
+        builtins_ns["print"] = lambda *args, **kw: self._add_log(
+            "INFO", " ".join(str(a) for a in args), "strategy"
+        )
         namespace: dict[str, Any] = {
             "Strategy": Strategy,
-            "__builtins__": {
-                # Required for class definitions
-                "__build_class__": __builtins__["__build_class__"] if isinstance(__builtins__, dict) else __builtins__.__build_class__,
-                # Allow safe built-ins
-                "abs": abs,
-                "all": all,
-                "any": any,
-                "bool": bool,
-                "dict": dict,
-                "enumerate": enumerate,
-                "filter": filter,
-                "float": float,
-                "hasattr": hasattr,
-                "int": int,
-                "isinstance": isinstance,
-                "len": len,
-                "list": list,
-                "map": map,
-                "max": max,
-                "min": min,
-                "print": lambda *args, **kw: self._add_log(
-                    "INFO", " ".join(str(a) for a in args), "strategy"
-                ),
-                "range": range,
-                "reversed": reversed,
-                "round": round,
-                "set": set,
-                "sorted": sorted,
-                "str": str,
-                "sum": sum,
-                "tuple": tuple,
-                "type": type,
-                "zip": zip,
-                "None": None,
-                "True": True,
-                "False": False,
-                "Exception": Exception,
-                "ValueError": ValueError,
-                "TypeError": TypeError,
-                "KeyError": KeyError,
-                "IndexError": IndexError,
-                "AttributeError": AttributeError,
-                "ZeroDivisionError": ZeroDivisionError,
-                "StopIteration": StopIteration,
-                "property": property,
-                "staticmethod": staticmethod,
-                "classmethod": classmethod,
-                "super": super,
-                "getattr": getattr,
-                "setattr": setattr,
-                "delattr": delattr,
-                "__name__": "__strategy__",
-                "__import__": _safe_import,
-            },
+            "__builtins__": builtins_ns,
         }
 
-        # Compile and execute
-        compiled = compile(code, "<strategy>", "exec")
-        exec(compiled, namespace)
+        # Execute, collecting Strategy subclasses as they are defined (see
+        # ``Strategy.__init_subclass__``).  The class statements must run
+        # every time so each backtest gets fresh class objects.
+        compiled = _compile_strategy(code)
+        token = _defined_subclasses.set([])
+        try:
+            exec(compiled, namespace)
+            defined = _defined_subclasses.get()
+        finally:
+            _defined_subclasses.reset(token)
 
         # Find the user's Strategy subclass
-        strategy_cls = None
-        for obj in namespace.values():
-            if (
-                isinstance(obj, type)
-                and issubclass(obj, Strategy)
-                and obj is not Strategy
-            ):
-                strategy_cls = obj
+        strategy_cls = defined[-1] if defined else None
 
         if strategy_cls is None:
             raise ValueError(
@@ -956,10 +1180,18 @@ class BacktestRunner(BaseRunner):
         """
         Move orders placed during the current ``on_data()`` call into the
         pending queue for execution on the next bar.
+
+        Orders cancelled since the last call are dropped here, so
+        ``cancel_order()`` never has to remove from the middle of a list.
         """
+        if self._has_cancelled_orders:
+            self._pending_orders = deque(o for o in self._pending_orders if o.status == "pending")
+            self._order_queue = deque(o for o in self._order_queue if o.status == "pending")
+            self._has_cancelled_orders = False
         if self._order_queue:
             self._pending_orders.extend(self._order_queue)
             self._order_queue.clear()
+            self._open_orders_cache = None
 
     def _process_pending_orders(self, current_bar_index: int) -> None:
         """
@@ -977,42 +1209,60 @@ class BacktestRunner(BaseRunner):
         if not self._pending_orders:
             return
 
-        still_pending: list[OrderEvent] = []
 
-        for order in self._pending_orders:
+        # Loop invariants: the bar does not change while orders are matched,
+        # so each symbol's bar dict is built once and shared by its orders
+        options_handler = self.options_handler
+        ts = self.data_handler.current_timestamp
+        fill_next_open = self.execution_handler.fill_at == "next_open"
+        bars: dict[str, dict] = {}
+
+        # Each order is popped once; those still resting are appended back
+        # behind the ones not yet looked at, keeping their relative order
+        pending = self._pending_orders
+        for _ in range(len(pending)):
+            order = pending.popleft()
             if order.status != "pending":
                 continue
 
             # Get the bar data needed for execution
             # For NFO orders, use options OHLCV; for regular, use data handler
             current_bar = None
-            if self.options_handler and order.exchange == "NFO":
-                ts = self.data_handler.current_timestamp
+            if options_handler and order.exchange == "NFO":
                 if ts:
-                    current_bar = self.options_handler.get_option_bar(order.symbol, ts)
+                    current_bar = options_handler.get_option_bar(order.symbol, ts)
                     if current_bar is not None:
                         # Use the underlying bar's timestamp for the fill
                         current_bar["timestamp"] = ts
                     else:
                         # No option bar available (data gap or stale) — cancel order
                         self._add_log(
-                            "WARNING",
-                            f"No option bar for {order.symbol} at {ts} — order cancelled",
-                            "runner",
+                            "WARNING", "No option bar for %s at %s — order cancelled", "runner",
+                            order.symbol, ts,
                         )
                         order.status = "cancelled"
-                        for rec in self.portfolio.orders:
-                            if rec["order_id"] == order.order_id:
-                                rec["status"] = "cancelled"
-                                break
+                        self._open_orders_cache = None
                         continue
             if current_bar is None:
-                current_bar = self.data_handler.get_current_bar(order.symbol)
+                symbol = order.symbol
+                if symbol in bars:
+                    current_bar = bars[symbol]
+                else:
+                    current_bar = bars[symbol] = self.data_handler.get_current_bar(symbol)
+
+            # Resting orders whose price the bar never reached stay pending
+            # without going through the execution handler
+            if (
+                order.order_type in _RESTING_ORDER_TYPES
+                and not _resting_order_reachable(order, current_bar)
+            ):
+                pending.append(order)
+                continue
 
             # For fill_at="next_open", the "current bar" for the execution
             # handler is the bar where the order was placed, and the "next bar"
             # is the bar we are on now.
-            if self.execution_handler.fill_at == "next_open":
+            if fill_next_open:
                 # The order was placed on a previous bar; the current bar IS the next bar
                 # We pass order_bar as current and this bar as next
                 # But we don't have order_bar stored, so we use current as "next"
@@ -1030,31 +1280,25 @@ class BacktestRunner(BaseRunner):
 
             if fill is not None:
                 order.status = "completed"
-                # Update order record
-                for rec in self.portfolio.orders:
-                    if rec["order_id"] == order.order_id:
-                        rec["status"] = "completed"
-                        rec["fill_price"] = fill.fill_price
-                        rec["commission"] = fill.commission
-                        break
+                self._open_orders_cache = None
+                self._order_fills[order.order_id] = fill
 
                 # Update portfolio
                 completed_trade = self.portfolio.update_on_fill(fill)
+                # Held symbols changed -- re-merge option prices on next query
+                self._context._prices_cache_ts = None
 
                 self._add_log(
-                    "INFO",
-                    f"Order filled: {fill.side} {fill.symbol} x{fill.quantity} @ {fill.fill_price:.2f} "
-                    f"(commission: {fill.commission:.2f})",
-                    "runner",
+                    "INFO", "Order filled: %s %s x%s @ %.2f (commission: %.2f)", "runner",
+                    fill.side, fill.symbol, fill.quantity, fill.fill_price, fill.commission,
                 )
 
                 if completed_trade is not None:
                     pnl = completed_trade.get("pnl", 0)
                     net_pnl = completed_trade.get("net_pnl", 0)
                     self._add_log(
-                        "INFO",
-                        f"Trade closed: {fill.symbol} — P&L: {pnl:.2f}, Net P&L: {net_pnl:.2f}",
-                        "runner",
+                        "INFO", "Trade closed: %s — P&L: %.2f, Net P&L: %.2f", "runner",
+                        fill.symbol, pnl, net_pnl,
                     )
 
                 # Notify strategy of the fill (always, not just on close)
@@ -1079,21 +1323,16 @@ class BacktestRunner(BaseRunner):
                 )
             else:
                 # Order not filled -- carry forward for limit/SL orders
-                if order.order_type.upper() in ("LIMIT", "SL", "SL-M"):
-                    still_pending.append(order)
+                if order.order_type in _RESTING_ORDER_TYPES:
+                    pending.append(order)
                 else:
                     # Market orders that couldn't fill — usually missing OHLCV data
                     order.status = "rejected"
-                    for rec in self.portfolio.orders:
-                        if rec["order_id"] == order.order_id:
-                            rec["status"] = "rejected"
-                            break
+                    self._open_orders_cache = None
                     reason = "no OHLCV data" if current_bar is None else "execution failed"
                     self._add_log(
-                        "WARNING",
-                        f"Market order for {order.symbol} rejected — {reason} at bar {current_bar_index} "
-                        f"({order.side} x{order.quantity})",
-                        "runner",
+                        "WARNING", "Market order for %s rejected — %s at bar %d (%s x%s)", "runner",
+                        order.symbol, reason, current_bar_index, order.side, order.quantity,
                     )
                     # Notify strategy so it can reset position state
                     try:
@@ -1116,77 +1355,239 @@ class BacktestRunner(BaseRunner):
                         order.symbol, current_bar_index, reason,
                     )
 
-        self._pending_orders = still_pending
-
 
 # ======================================================================
 # Helpers
 # ======================================================================
 
+# IST has no DST, so naive UTC wall times shift by a constant offset
+_IST_OFFSET = timedelta(hours=5, minutes=30)
+
+
 def _to_ist(ts: datetime) -> datetime:
     """Convert a datetime to IST. If naive, assume UTC."""
     if ts.tzinfo is None:
-        ts = ts.replace(tzinfo=timezone.utc)
+        return (ts + _IST_OFFSET).replace(tzinfo=IST)
     return ts.astimezone(IST)
 
 
-def _safe_import(name: str, *args, **kwargs):
+def _eod_trigger_mask(timestamps: list[datetime], eod_minute: int) -> np.ndarray:
     """
-    Restricted import function for user strategy code.
+    Return a boolean array marking, for each IST trading day, the first bar
+    at or after *eod_minute* (IST minutes past midnight).  Naive timestamps
+    are taken as UTC, as in :func:`_to_ist`.
+    """
+    dti = pd.to_datetime(timestamps, utc=True).tz_convert(IST)
+    minutes = np.asarray(dti.hour * 60 + dti.minute)
+    days = dti.normalize().asi8
+
+    mask = np.zeros(len(timestamps), dtype=bool)
+    reached = np.flatnonzero(minutes >= eod_minute)
+    if reached.size:
+        reached_days = days[reached]
+        first_of_day = np.concatenate(([True], reached_days[1:] != reached_days[:-1]))
+        mask[reached[first_of_day]] = True
+    return mask
 
-    Only allows importing a whitelist of safe modules.
+
+def _resting_order_reachable(order: OrderEvent, bar: dict | None) -> bool:
     """
-    allowed = {
-        "math",
-        "datetime",
-        "collections",
-        "itertools",
-        "functools",
-        "decimal",
-        "statistics",
-        "dataclasses",
-        "typing",
-        "enum",
-        "copy",
-        "json",
-        "re",
-    }
+    Cheap pre-check for LIMIT / SL / SL-M orders: ``False`` only when the
+    bar's range cannot have reached the order's limit or trigger price,
+    i.e. when ``SimulatedExecutionHandler.execute_order`` would return
+    ``None``.  Orders missing a price are left to the execution handler.
+    """
+    if not bar:
+        return False
+    level = order.price if order.order_type == "LIMIT" else order.trigger_price
+    if level is None:
+        return True
+    if order.side == "BUY":
+        return (bar["low"] <= level) if order.order_type == "LIMIT" else (bar["high"] >= level)
+    return (bar["high"] >= level) if order.order_type == "LIMIT" else (bar["low"] <= level)
+
+
+def _position_info(pos: Position, current_price: float) -> PositionInfo:
+    """Build a PositionInfo with unrealized P&L from a portfolio position."""
+    qty = pos.quantity
+    avg_price = pos.avg_price
+    unrealized = pos.side_sign * (current_price - avg_price) * qty
+    cost = avg_price * qty
+    pnl_pct = (unrealized / cost * 100) if cost != 0 else 0.0
+
+    return PositionInfo(
+        symbol=pos.symbol,
+        exchange=pos.exchange,
+        side=pos.side,
+        quantity=qty,
+        average_entry_price=avg_price,
+        current_price=current_price,
+        unrealized_pnl=round(unrealized, 2),
+        pnl_percent=round(pnl_pct, 4),
+    )
+
+
+# Modules user strategy code may import (``np``/``pd`` kept for aliases)
+_ALLOWED_IMPORTS = frozenset({
+    "math",
+    "datetime",
+    "collections",
+    "itertools",
+    "functools",
+    "decimal",
+    "statistics",
+    "dataclasses",
+    "typing",
+    "enum",
+    "copy",
+    "json",
+    "re",
+    # numpy and pandas are needed for indicators
+    "numpy",
+    "np",
+    "pandas",
+    "pd",
+})
+
+# Modules already resolved by ``_safe_import`` for plain ``import name``
+# statements.  ``from name import x`` is never cached: ``__import__`` has to
+# run for it so submodules named in the fromlist get loaded.
+_IMPORT_CACHE: dict[str, ModuleType] = {}
+
+
+def _safe_import(name: str, globals=None, locals=None, fromlist=(), level=0):
+    """
+    Restricted import function for user strategy code.
 
-    # Allow importing numpy and pandas (needed for indicators)
-    allowed.update({"numpy", "np", "pandas", "pd"})
+    Only allows importing a whitelist of safe modules.  Absolute imports
+    without a fromlist that pass the check are cached so repeated
+    ``import`` statements in strategy code skip both the whitelist check
+    and ``__import__``.
+    """
+    cacheable = level == 0 and not fromlist
+    if cacheable:
+        module = _IMPORT_CACHE.get(name)
+        if module is not None:
+            return module
 
     # Extract the top-level module name
-    top_level = name.split(".")[0]
+    top_level = name.partition(".")[0]
 
-    if top_level not in allowed:
+    if top_level not in _ALLOWED_IMPORTS:
         raise ImportError(
             f"Importing '{name}' is not allowed in strategy code. "
-            f"Allowed modules: {', '.join(sorted(allowed))}"
+            f"Allowed modules: {', '.join(sorted(_ALLOWED_IMPORTS))}"
         )
 
-    return __import__(name, *args, **kwargs)
+    module = __import__(name, globals, locals, fromlist, level)
+    if cacheable:
+        _IMPORT_CACHE[name] = module
+    return module
+
+
+# Builtins exposed to strategy code.  ``print`` is added per run so it can
+# log to the owning runner.
+_STRATEGY_BUILTINS: dict[str, Any] = {
+    # Required for class definitions
+    "__build_class__": builtins.__build_class__,
+    # Allow safe built-ins
+    "abs": abs,
+    "all": all,
+    "any": any,
+    "bool": bool,
+    "dict": dict,
+    "enumerate": enumerate,
+    "filter": filter,
+    "float": float,
+    "hasattr": hasattr,
+    "int": int,
+    "isinstance": isinstance,
+    "len": len,
+    "list": list,
+    "map": map,
+    "max": max,
+    "min": min,
+    "range": range,
+    "reversed": reversed,
+    "round": round,
+    "set": set,
+    "sorted": sorted,
+    "str": str,
+    "sum": sum,
+    "tuple": tuple,
+    "type": type,
+    "zip": zip,
+    "None": None,
+    "True": True,
+    "False": False,
+    "Exception": Exception,
+    "ValueError": ValueError,
+    "TypeError": TypeError,
+    "KeyError": KeyError,
+    "IndexError": IndexError,
+    "AttributeError": AttributeError,
+    "ZeroDivisionError": ZeroDivisionError,
+    "StopIteration": StopIteration,
+    "property": property,
+    "staticmethod": staticmethod,
+    "classmethod": classmethod,
+    "super": super,
+    "getattr": getattr,
+    "setattr": setattr,
+    "delattr": delattr,
+    "__name__": "__strategy__",
+    "__import__": _safe_import,
+}
+
+# Compiled strategy code keyed by a hash of its source, so parameter sweeps
+# that rerun the same strategy skip ``compile()``.  Insertion order doubles
+# as LRU order.
+_CODE_CACHE: dict[bytes, CodeType] = {}
+_CODE_CACHE_MAX = 64
+
+
+def _compile_strategy(code: str) -> CodeType:
+    """Compile strategy *code*, reusing the cached code object if present."""
+    key = hashlib.blake2b(code.encode(), digest_size=16).digest()
+    compiled = _CODE_CACHE.pop(key, None)
+    if compiled is None:
+        compiled = compile(code, "<strategy>", "exec")
+        if len(_CODE_CACHE) >= _CODE_CACHE_MAX:
+            del _CODE_CACHE[next(iter(_CODE_CACHE))]
+    _CODE_CACHE[key] = compiled
+    return compiled
+
+
+# Formats deferred strategy log records the way a bare handler would
+_STRATEGY_LOG_FORMATTER = logging.Formatter()
 
 
 class _ListLogHandler(logging.Handler):
-    """A logging handler that appends structured log entries to a list."""
+    """
+    A logging handler that feeds the runner's per-bar log buffer.
+
+    Records with a plain string message are buffered unformatted;
+    ``BacktestRunner._materialize_logs`` formats them once the run's results
+    are assembled.  Records with ``%`` args are formatted on emit, so the
+    args are rendered in their state at logging time and not kept alive.
+    """
 
-    def __init__(self, log_list: list[dict], data_handler=None) -> None:
+    _LEVEL_MAP = {
+        logging.DEBUG: "INFO",
+        logging.INFO: "INFO",
+        logging.WARNING: "WARNING",
+        logging.ERROR: "ERROR",
+    }
+
+    def __init__(self, log_buffer: list[tuple[str, str, str | logging.LogRecord]]) -> None:
         super().__init__()
-        self._logs = log_list
-        self._data_handler = data_handler
+        self._buffer = log_buffer
 
     def emit(self, record: logging.LogRecord) -> None:
-        try:
-            msg = self.format(record)
-            level_map = {logging.DEBUG: "INFO", logging.INFO: "INFO", logging.WARNING: "WARNING", logging.ERROR: "ERROR"}
-            ts = (self._data_handler.current_timestamp
-                  if self._data_handler and self._data_handler.current_timestamp
-                  else datetime.now(timezone.utc))
-            self._logs.append({
-                "level": level_map.get(record.levelno, "INFO"),
-                "source": "strategy",
-                "message": msg,
-                "timestamp": ts.isoformat() if isinstance(ts, datetime) else str(ts),
-            })
-        except Exception:
-            pass
+        message: str | logging.LogRecord = record
+        if record.args or not isinstance(record.msg, str):
+            try:
+                message = self.format(record)
+            except Exception:
+                return
+        self._buffer.append((self._LEVEL_MAP.get(record.levelno, "INFO"), "strategy", message))
@@ -3,16 +3,24 @@ Event dataclasses for the event-driven trading engine architecture.
 
 These events flow through the system in the following order:
   MarketEvent -> (strategy logic) -> SignalEvent -> OrderEvent -> FillEvent
+
+All events are slotted (no per-instance ``__dict__``) since one is created
+per bar, order or fill.  They are not frozen: ``OrderEvent.status`` is
+updated in place, and frozen dataclasses are several times slower to
+construct.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+__all__ = ["MarketEvent", "SignalEvent", "OrderEvent", "FillEvent"]
+
+
+@dataclass(slots=True)
 class MarketEvent:
     """New market bar available for one or more symbols."""
 
@@ -20,7 +28,7 @@ class MarketEvent:
     data: dict  # {symbol: {open, high, low, close, volume}}
 
 
-@dataclass
+@dataclass(slots=True)
 class SignalEvent:
     """Strategy generated a trading signal."""
 
@@ -34,9 +42,13 @@ class SignalEvent:
     product: str = "MIS"
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderEvent:
-    """An order to be sent for execution."""
+    """An order to be sent for execution.
+
+    Slotted: one is created per order and its ``status`` (and for paper
+    SL/TP orders, ``price``/``trigger_price``) is updated in place.
+    """
 
     timestamp: datetime
     symbol: str
@@ -51,7 +63,7 @@ class OrderEvent:
     status: str = "pending"
 
 
-@dataclass
+@dataclass(slots=True)
 class FillEvent:
     """An order has been filled (fully or partially)."""
 
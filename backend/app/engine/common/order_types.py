@@ -1,6 +1,11 @@
-"""Enumerations for order-related constants used across all engine modes."""
+"""Enumerations for order-related constants used across all engine modes.
+
+The plain ``str`` constants at the bottom carry the same values for code
+that compares against raw strings and has no use for the Enum types.
+"""
 
 from enum import Enum
+from typing import Final
 
 
 class OrderSide(str, Enum):
@@ -27,3 +32,17 @@ class OrderStatus(str, Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
     REJECTED = "rejected"
+
+
+# Plain string values of the enums above
+BUY: Final = "BUY"
+SELL: Final = "SELL"
+
+MARKET: Final = "MARKET"
+LIMIT: Final = "LIMIT"
+SL: Final = "SL"
+SL_M: Final = "SL-M"
+
+CNC: Final = "CNC"
+MIS: Final = "MIS"
+NRML: Final = "NRML"
@@ -1,11 +1,47 @@
 """Kite Connect order executor — places REAL orders on Zerodha."""
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any, Optional
 from kiteconnect import KiteConnect
 
+from app.engine.common.order_types import LIMIT, SL, SL_M
+from app.integrations.kite_connect.constants import Exchange
+
 logger = logging.getLogger(__name__)
 
+# Kite allows 10 order requests per second; square-off sends at most this
+# many at once and waits between batches.
+SQUARE_OFF_BATCH_SIZE = 10
+SQUARE_OFF_BATCH_INTERVAL = 1.0
+
+_KITE_EXCHANGES = frozenset(
+    value for name, value in vars(Exchange).items() if not name.startswith("_")
+)
+
+
+def _prevalidate(
+    symbol: str,
+    exchange: str,
+    quantity: int,
+    order_type: str,
+    price: float | None,
+    trigger_price: float | None,
+) -> tuple[bool, str | None]:
+    """Catch orders Kite is certain to reject before making the API call."""
+    if not symbol:
+        return False, "Missing trading symbol"
+    if exchange not in _KITE_EXCHANGES:
+        return False, f"Unknown exchange {exchange!r}"
+    if quantity <= 0:
+        return False, f"Quantity must be positive, got {quantity}"
+    if order_type == LIMIT and not price:
+        return False, "LIMIT order requires a price"
+    if (order_type == SL or order_type == SL_M) and not trigger_price:
+        return False, f"{order_type} order requires a trigger price"
+    return True, None
+
 
 class KiteExecutor:
     """
@@ -40,32 +76,52 @@ class KiteExecutor:
         Returns dict with 'order_id' and 'status'.
         """
         try:
+            # Callers normally pass upper-case values already
+            if not order_type.isupper():
+                order_type = order_type.upper()
+            if not side.isupper():
+                side = side.upper()
+            if not product.isupper():
+                product = product.upper()
+
+            ok, reason = _prevalidate(symbol, exchange, quantity, order_type, price, trigger_price)
+            if not ok:
+                logger.error("Order rejected before placement: %s %s x%d: %s", side, symbol, quantity, reason)
+                return {
+                    "order_id": None,
+                    "status": "failed",
+                    "error": reason,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                }
+
             params = {
                 "tradingsymbol": symbol,
                 "exchange": exchange,
-                "transaction_type": side.upper(),
+                "transaction_type": side,
                 "quantity": quantity,
-                "order_type": order_type.upper(),
-                "product": product.upper(),
+                "order_type": order_type,
+                "product": product,
                 "variety": variety,
             }
 
-            if order_type.upper() == "LIMIT" and price:
-                params["price"] = price
-            elif order_type.upper() == "SL":
+            if order_type == LIMIT:
+                if price:
+                    params["price"] = price
+            elif order_type == SL:
                 if trigger_price:
                     params["trigger_price"] = trigger_price
                 if price:
                     params["price"] = price
-            elif order_type.upper() == "SL-M":
+            elif order_type == SL_M:
                 if trigger_price:
                     params["trigger_price"] = trigger_price
 
             broker_order_id = self._kite.place_order(**params)
-            logger.info(
-                "Order placed: %s %s %s x%d -> order_id=%s",
-                side, symbol, order_type, quantity, broker_order_id,
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Order placed: %s %s %s x%d -> order_id=%s",
+                    side, symbol, order_type, quantity, broker_order_id,
+                )
             return {
                 "order_id": str(broker_order_id),
                 "status": "placed",
@@ -138,6 +194,10 @@ class KiteExecutor:
             logger.error("Failed to fetch orders: %s", e)
             return []
 
+    def get_orders_by_id(self) -> dict[str, dict]:
+        """Get the latest state of all of today's orders, keyed by order id."""
+        return {str(order.get("order_id")): order for order in self.get_all_orders()}
+
     def get_positions(self) -> dict:
         """Get all positions from Kite."""
         try:
@@ -147,31 +207,41 @@ class KiteExecutor:
             return {"net": [], "day": []}
 
     def square_off_all(self, exchange: str = "NSE", product: str = "MIS") -> list[dict]:
-        """Emergency square off: close ALL open positions."""
+        """
+        Emergency square off: close ALL open positions.
+
+        Closing orders are sent concurrently in batches of
+        ``SQUARE_OFF_BATCH_SIZE`` to stay under Kite's order rate limit.
+        """
         results = []
         try:
             positions = self._kite.positions()
+            orders = []
             for pos in positions.get("net", []):
                 qty = pos.get("quantity", 0)
                 if qty == 0:
                     continue
 
                 side = "SELL" if qty > 0 else "BUY"
-                abs_qty = abs(qty)
-                symbol = pos.get("tradingsymbol", "")
-                exch = pos.get("exchange", exchange)
-
-                result = self.place_order(
-                    symbol=symbol,
-                    exchange=exch,
-                    side=side,
-                    quantity=abs_qty,
-                    order_type="MARKET",
-                    product=pos.get("product", product),
-                )
-                result["symbol"] = symbol
-                result["action"] = f"{side} {abs_qty}"
-                results.append(result)
+                orders.append({
+                    "symbol": pos.get("tradingsymbol", ""),
+                    "exchange": pos.get("exchange", exchange),
+                    "side": side,
+                    "quantity": abs(qty),
+                    "order_type": "MARKET",
+                    "product": pos.get("product", product),
+                })
+
+            if orders:
+                with ThreadPoolExecutor(max_workers=min(len(orders), SQUARE_OFF_BATCH_SIZE)) as pool:
+                    for start in range(0, len(orders), SQUARE_OFF_BATCH_SIZE):
+                        if start:
+                            time.sleep(SQUARE_OFF_BATCH_INTERVAL)
+                        batch = orders[start:start + SQUARE_OFF_BATCH_SIZE]
+                        for order, result in zip(batch, pool.map(lambda o: self.place_order(**o), batch)):
+                            result["symbol"] = order["symbol"]
+                            result["action"] = f"{order['side']} {order['quantity']}"
+                            results.append(result)
 
             logger.warning("EMERGENCY SQUARE OFF: %d positions closed", len(results))
         except Exception as e:
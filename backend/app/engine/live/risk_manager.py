@@ -1,6 +1,8 @@
 """Risk manager for live trading — validates every order before execution."""
 import logging
-from datetime import datetime, timezone, timedelta
+import time
+from collections import deque
+from collections.abc import Mapping
 
 from app.core.timezone import IST
 from app.integrations.kite_connect.constants import (
@@ -10,6 +12,18 @@ from app.integrations.kite_connect.constants import (
 
 logger = logging.getLogger(__name__)
 
+# IST is a fixed offset, so the trading day and session bounds can be
+# worked out from time.time() without building datetimes per order
+_IST_OFFSET_SECONDS = int(IST.utcoffset(None).total_seconds())
+_SECONDS_PER_DAY = 86400
+_MARKET_OPEN_SECONDS = MARKET_OPEN_HOUR * 3600 + MARKET_OPEN_MINUTE * 60
+_MARKET_CLOSE_SECONDS = MARKET_CLOSE_HOUR * 3600 + MARKET_CLOSE_MINUTE * 60
+
+
+def _ist_day(epoch: float) -> int:
+    """Day number (days since the epoch) of *epoch* on the IST calendar."""
+    return int((epoch + _IST_OFFSET_SECONDS) // _SECONDS_PER_DAY)
+
 
 class RiskManager:
     """
@@ -35,20 +49,31 @@ class RiskManager:
 
         # Tracking
         self._daily_pnl = 0.0
-        self._order_timestamps: list[datetime] = []
+        # time.monotonic() of each accepted order in the last minute, oldest first
+        self._order_timestamps: deque[float] = deque()
         self._current_positions_count = 0
-        self._daily_date: str = ""
+        self._daily_day: int | None = None  # IST day number, see _ist_day()
+
+        # Today's trading session bounds as epoch seconds, set by reset_daily()
+        self._market_open_ts = 0.0
+        self._market_close_ts = 0.0
+        self._market_closed_reason = (
+            f"Market is closed. Trading hours: {MARKET_OPEN_HOUR}:{MARKET_OPEN_MINUTE:02d} - "
+            f"{MARKET_CLOSE_HOUR}:{MARKET_CLOSE_MINUTE:02d} IST"
+        )
 
     def reset_daily(self):
-        """Reset daily counters."""
+        """Reset daily counters and recompute today's market-hours bounds."""
         self._daily_pnl = 0.0
         self._order_timestamps.clear()
-        self._daily_date = datetime.now(IST).strftime("%Y-%m-%d")
+        self._daily_day = _ist_day(time.time())
+        midnight = self._daily_day * _SECONDS_PER_DAY - _IST_OFFSET_SECONDS
+        self._market_open_ts = float(midnight + _MARKET_OPEN_SECONDS)
+        self._market_close_ts = float(midnight + _MARKET_CLOSE_SECONDS)
 
     def update_pnl(self, realized_pnl: float):
         """Update daily P&L tracking."""
-        today = datetime.now(IST).strftime("%Y-%m-%d")
-        if today != self._daily_date:
+        if _ist_day(time.time()) != self._daily_day:
             self.reset_daily()
         self._daily_pnl += realized_pnl
 
@@ -62,26 +87,24 @@ class RiskManager:
         quantity: int,
         price: float | None,
         order_type: str,
-        current_positions: list[dict],
+        current_positions: Mapping[str, str],
     ) -> tuple[bool, str | None]:
         """
         Validate an order against all risk rules.
 
+        ``current_positions`` maps each open symbol to its side
+        (``"LONG"`` / ``"SHORT"``).
+
+        The plain numeric checks (rules 2-5) run first so the common
+        rejections return before the market-hours and rate-limit checks.
+
         Returns (allowed, rejection_reason).
         """
-        now_ist = datetime.now(IST)
-        today = now_ist.strftime("%Y-%m-%d")
+        now = time.time()
 
-        if today != self._daily_date:
+        if _ist_day(now) != self._daily_day:
             self.reset_daily()
 
-        # 1. Market hours check
-        if self.enforce_market_hours:
-            market_open = now_ist.replace(hour=MARKET_OPEN_HOUR, minute=MARKET_OPEN_MINUTE, second=0, microsecond=0)
-            market_close = now_ist.replace(hour=MARKET_CLOSE_HOUR, minute=MARKET_CLOSE_MINUTE, second=0, microsecond=0)
-            if now_ist < market_open or now_ist > market_close:
-                return False, f"Market is closed. Trading hours: {MARKET_OPEN_HOUR}:{MARKET_OPEN_MINUTE:02d} - {MARKET_CLOSE_HOUR}:{MARKET_CLOSE_MINUTE:02d} IST"
-
         # 2. Position size check
         if quantity > self.max_position_size:
             return False, f"Order quantity {quantity} exceeds max position size {self.max_position_size}"
@@ -97,19 +120,27 @@ class RiskManager:
 
         # 5. Max open positions
         if side == "BUY" and self._current_positions_count >= self.max_open_positions:
-            # Check if this is closing an existing position
-            has_existing = any(p.get("symbol") == symbol and p.get("side") == "SHORT" for p in current_positions)
-            if not has_existing:
+            # Allowed only if this is closing an existing short position
+            if current_positions.get(symbol) != "SHORT":
                 return False, f"Max open positions ({self.max_open_positions}) reached"
 
+        # 1. Market hours check
+        if self.enforce_market_hours:
+            if now < self._market_open_ts or now > self._market_close_ts:
+                return False, self._market_closed_reason
+
         # 6. Rate limit
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=1)
-        self._order_timestamps = [t for t in self._order_timestamps if t > cutoff]
-        if len(self._order_timestamps) >= self.max_orders_per_minute:
+        order_times = self._order_timestamps
+        now_mono = time.monotonic()
+        cutoff = now_mono - 60.0
+        while order_times and order_times[0] <= cutoff:
+            order_times.popleft()
+        if len(order_times) >= self.max_orders_per_minute:
             return False, f"Rate limit: max {self.max_orders_per_minute} orders per minute"
 
         # Track the order timestamp
-        self._order_timestamps.append(datetime.now(timezone.utc))
+        order_times.append(now_mono)
 
-        logger.info("Risk check PASSED: %s %s x%d", side, symbol, quantity)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Risk check PASSED: %s %s x%d", side, symbol, quantity)
         return True, None
@@ -4,24 +4,32 @@ from __future__ import annotations
 import asyncio
 import logging
 import uuid
+from collections import deque
 from datetime import datetime, timezone, timedelta
 from typing import Any, Optional
 
+import pandas as pd
+
 from app.core.timezone import IST
 from app.engine.common.base_runner import BaseRunner
 from app.engine.common.events import OrderEvent
 from app.engine.live.risk_manager import RiskManager
 from app.engine.live.kite_executor import KiteExecutor
-from app.engine.paper.runner import PaperTradingContext, TIMEFRAME_SECONDS, _bar_start_time
+from app.engine.paper.runner import (
+    PaperTradingContext, TIMEFRAME_SECONDS, _bar_start_time, _normalize_instruments,
+)
 from app.engine.backtest.portfolio import Portfolio
 from app.sdk.context import TradingContext
 from app.sdk.types import FilledOrder, PositionInfo
-from app.services.notification_service import fire_notification
+from app.services.notification_service import fire_notification, fire_notifications
 from app.schemas.notifications import NotificationEventType
 from app.services.session_logger import SessionLogger
 
 logger = logging.getLogger(__name__)
 
+# Stop-loss order types, as stored (upper-cased) in _pending_broker_orders
+_SL_ORDER_TYPES = frozenset({"SL", "SL-M"})
+
 
 class LiveTradingContext(TradingContext):
     """TradingContext for live trading — validates through risk manager before placing."""
@@ -40,9 +48,8 @@ class LiveTradingContext(TradingContext):
         return price
 
     def get_current_bar(self, symbol: str | None = None) -> dict:
-        if symbol is None and self._runner._instruments:
-            inst = self._runner._instruments[0]
-            symbol = inst if isinstance(inst, str) else inst.get("symbol", "")
+        if symbol is None:
+            symbol = self._runner._default_symbol
         if not symbol:
             return {}
         # Return the real aggregated in-progress bar (like paper trading)
@@ -52,7 +59,7 @@ class LiveTradingContext(TradingContext):
                 "open": bar["open"], "high": bar["high"],
                 "low": bar["low"], "close": bar["close"],
                 "volume": bar["volume"],
-                "timestamp": bar.get("bar_start", datetime.now(IST)),
+                "timestamp": bar["bar_start"],
             }
         # Fallback: no bar yet, use LTP
         price = self._runner._current_prices.get(symbol, 0)
@@ -81,73 +88,48 @@ class LiveTradingContext(TradingContext):
 
     def buy(self, symbol: str, quantity: int, order_type: str = "MARKET",
             price: float | None = None, exchange: str = "NSE", product: str = "MIS") -> str:
-        if self._is_time_locked():
-            now = datetime.now(IST)
-            self._runner.slog.warning(f"BUY {symbol} blocked — time lock active at {now.strftime('%H:%M')}", source="runner")
-            return ""
-
-        # Risk check
-        positions = self._runner.portfolio.get_all_positions()
-        allowed, reason = self._runner.risk_manager.validate_order(
-            symbol, "BUY", quantity, price or self._runner._current_prices.get(symbol),
-            order_type, positions,
-        )
-        if not allowed:
-            self._runner._logs.append(f"[RISK] BUY {symbol} x{quantity} REJECTED: {reason}")
-            self._runner.slog.warning(f"RISK REJECTED: BUY {symbol} x{quantity} — {reason}", source="runner")
-            return f"REJECTED-{reason[:20]}"
-
-        # Place real order
-        result = self._runner.executor.place_order(
-            symbol=symbol, exchange=exchange, side="BUY",
-            quantity=quantity, order_type=order_type, price=price, product=product,
-        )
-
-        order_id = result.get("order_id") or f"LIVE-{uuid.uuid4().hex[:8]}"
-        if result.get("status") == "placed":
-            self._runner._pending_broker_orders[order_id] = {
-                "symbol": symbol, "exchange": exchange, "side": "BUY",
-                "quantity": quantity, "order_type": order_type, "price": price,
-            }
-            self._runner.slog.info(f"BUY order placed: {symbol} x{quantity} @ {price or 'MARKET'} -> {order_id}", source="runner")
-        else:
-            self._runner._logs.append(f"[ERROR] BUY {symbol} failed: {result.get('error')}")
-            self._runner.slog.error(f"BUY {symbol} x{quantity} FAILED: {result.get('error')}", source="runner")
-
-        return order_id
+        return self._place("BUY", symbol, quantity, order_type, price, exchange, product)
 
     def sell(self, symbol: str, quantity: int, order_type: str = "MARKET",
              price: float | None = None, exchange: str = "NSE", product: str = "MIS") -> str:
+        return self._place("SELL", symbol, quantity, order_type, price, exchange, product)
+
+    def _place(self, side: str, symbol: str, quantity: int, order_type: str,
+               price: float | None, exchange: str, product: str) -> str:
+        """Risk-check and place a real order; *side* is "BUY" or "SELL"."""
+        runner = self._runner
         if self._is_time_locked():
             now = datetime.now(IST)
-            self._runner.slog.warning(f"SELL {symbol} blocked — time lock active at {now.strftime('%H:%M')}", source="runner")
+            runner.slog.warning(f"{side} {symbol} blocked — time lock active at {now.strftime('%H:%M')}", source="runner")
             return ""
 
-        positions = self._runner.portfolio.get_all_positions()
-        allowed, reason = self._runner.risk_manager.validate_order(
-            symbol, "SELL", quantity, price or self._runner._current_prices.get(symbol),
+        # Risk check
+        positions = {sym: pos.side for sym, pos in runner.portfolio.positions.items()}
+        allowed, reason = runner.risk_manager.validate_order(
+            symbol, side, quantity, price or runner._current_prices.get(symbol),
             order_type, positions,
         )
         if not allowed:
-            self._runner._logs.append(f"[RISK] SELL {symbol} x{quantity} REJECTED: {reason}")
-            self._runner.slog.warning(f"RISK REJECTED: SELL {symbol} x{quantity} — {reason}", source="runner")
+            runner._logs.append(f"[RISK] {side} {symbol} x{quantity} REJECTED: {reason}")
+            runner.slog.warning(f"RISK REJECTED: {side} {symbol} x{quantity} — {reason}", source="runner")
             return f"REJECTED-{reason[:20]}"
 
-        result = self._runner.executor.place_order(
-            symbol=symbol, exchange=exchange, side="SELL",
+        # Place real order
+        result = runner.executor.place_order(
+            symbol=symbol, exchange=exchange, side=side,
             quantity=quantity, order_type=order_type, price=price, product=product,
         )
 
         order_id = result.get("order_id") or f"LIVE-{uuid.uuid4().hex[:8]}"
         if result.get("status") == "placed":
-            self._runner._pending_broker_orders[order_id] = {
-                "symbol": symbol, "exchange": exchange, "side": "SELL",
-                "quantity": quantity, "order_type": order_type, "price": price,
+            runner._pending_broker_orders[order_id] = {
+                "symbol": symbol, "exchange": exchange, "side": side,
+                "quantity": quantity, "order_type": order_type.upper(), "price": price,
             }
-            self._runner.slog.info(f"SELL order placed: {symbol} x{quantity} @ {price or 'MARKET'} -> {order_id}", source="runner")
+            runner.slog.info(f"{side} order placed: {symbol} x{quantity} @ {price or 'MARKET'} -> {order_id}", source="runner")
         else:
-            self._runner._logs.append(f"[ERROR] SELL {symbol} failed: {result.get('error')}")
-            self._runner.slog.error(f"SELL {symbol} x{quantity} FAILED: {result.get('error')}", source="runner")
+            runner._logs.append(f"[ERROR] {side} {symbol} failed: {result.get('error')}")
+            runner.slog.error(f"{side} {symbol} x{quantity} FAILED: {result.get('error')}", source="runner")
 
         return order_id
 
@@ -155,26 +137,26 @@ class LiveTradingContext(TradingContext):
         result = self._runner.executor.cancel_order(order_id)
         return result.get("status") == "cancelled"
 
+    def _position_info(self, pos) -> PositionInfo:
+        """Build a PositionInfo for a portfolio Position at the current price."""
+        current_price = self._runner._current_prices.get(pos.symbol, pos.avg_price)
+        qty = pos.quantity
+        avg_price = pos.avg_price
+        unrealized = pos.side_sign * (current_price - avg_price) * qty
+        pnl_pct = (unrealized / (avg_price * qty) * 100) if avg_price * qty != 0 else 0.0
+        return PositionInfo(
+            symbol=pos.symbol, exchange=pos.exchange, side=pos.side,
+            quantity=qty, average_entry_price=avg_price,
+            current_price=current_price,
+            unrealized_pnl=round(unrealized, 2), pnl_percent=round(pnl_pct, 4),
+        )
+
     def get_positions(self) -> list[PositionInfo]:
-        positions = self._runner.portfolio.get_all_positions()
-        result = []
-        for pos in positions:
-            symbol = pos["symbol"]
-            current_price = self._runner._current_prices.get(symbol, pos["avg_price"])
-            qty = pos["quantity"]
-            avg_price = pos["avg_price"]
-            unrealized = (current_price - avg_price) * qty if pos["side"] == "LONG" else (avg_price - current_price) * qty
-            pnl_pct = (unrealized / (avg_price * qty) * 100) if avg_price * qty != 0 else 0.0
-            result.append(PositionInfo(
-                symbol=symbol, exchange=pos["exchange"], side=pos["side"],
-                quantity=qty, average_entry_price=avg_price,
-                current_price=current_price,
-                unrealized_pnl=round(unrealized, 2), pnl_percent=round(pnl_pct, 4),
-            ))
-        return result
+        return [self._position_info(pos) for pos in self._runner.portfolio.positions.values()]
 
     def get_position(self, symbol: str) -> PositionInfo | None:
-        return next((p for p in self.get_positions() if p.symbol == symbol), None)
+        pos = self._runner.portfolio.positions.get(symbol)
+        return self._position_info(pos) if pos is not None else None
 
     def get_portfolio_value(self) -> float:
         prices = self._runner._current_prices
@@ -218,6 +200,8 @@ class LiveTradingRunner(BaseRunner):
         self._context: Optional[LiveTradingContext] = None
         self._current_prices: dict[str, float] = {}
         self._tracked_symbols: set[str] = set()
+        self._symbol_list: tuple[str, ...] = ()  # clean instrument symbols, set by start()
+        self._default_symbol = ""
         self._pending_broker_orders: dict[str, dict] = {}  # broker_order_id -> order info
         self._historical_cache: dict[str, Any] = {}
 
@@ -229,7 +213,9 @@ class LiveTradingRunner(BaseRunner):
         self._running = False
         self._paused = False
         self._tick_callback: Optional[Any] = None
-        self._logs: list[str] = []
+        self._tick_lock = asyncio.Lock()
+        # Recent risk rejects / errors; bounded because on_tick errors can repeat every tick
+        self._logs: deque[str] = deque(maxlen=1000)
         self.slog = SessionLogger(session_id, db_session_factory)
         self._db_session_factory = db_session_factory
         self.run_id: str | None = None  # Set by trading.py when a SessionRun is created
@@ -267,14 +253,33 @@ class LiveTradingRunner(BaseRunner):
         if not self._running or self._paused:
             return
 
+        # The ticker schedules one coroutine per tick and broker calls now
+        # yield the loop, so serialize ticks to keep fills and strategy
+        # callbacks in arrival order
+        async with self._tick_lock:
+            await self._process_market_data(data)
+
+    async def _process_market_data(self, data: dict) -> None:
+        # Re-check after waiting on the lock: the session may have been
+        # stopped, paused or squared off while earlier ticks ran
+        if not self._running or self._paused:
+            return
+
+        # One clock read per tick, taken on arrival (before any broker call)
+        now = datetime.now(timezone.utc)
+        ist_now = now.astimezone(IST)
+
         self._current_prices.update(data)
-        self._tracked_symbols.update(data.keys())
+        if not data.keys() <= self._tracked_symbols:
+            self._tracked_symbols.update(data.keys())
 
-        # Check pending order statuses
-        await self._check_order_statuses()
+        # Check pending order statuses (most ticks have none)
+        if self._pending_broker_orders:
+            await self._check_order_statuses()
+            if not self._running or self._paused:
+                return
 
         # --- Bar aggregation (matches paper trading) ---
-        now = datetime.now(timezone.utc)
         bar_start = _bar_start_time(now, self._tf_seconds)
         bar_completed = False
 
@@ -326,7 +331,6 @@ class LiveTradingRunner(BaseRunner):
 
         # EOD square-off AFTER on_data so strategy has a chance to exit first
         if self._eod_time:
-            ist_now = datetime.now(IST)
             now_time = (ist_now.hour, ist_now.minute)
             today_str = ist_now.strftime("%Y-%m-%d")
             if now_time >= self._eod_time and self._eod_done_today != today_str:
@@ -362,21 +366,20 @@ class LiveTradingRunner(BaseRunner):
                 # Also try to cancel pending broker orders
                 if self._pending_broker_orders:
                     self.slog.info(f"EOD: cancelling {len(self._pending_broker_orders)} pending broker order(s)", source="runner")
-                    for oid in list(self._pending_broker_orders.keys()):
-                        try:
-                            self.executor.cancel_order(oid)
-                        except Exception:
-                            pass
+                    await asyncio.gather(
+                        *(asyncio.to_thread(self.executor.cancel_order, oid)
+                          for oid in list(self._pending_broker_orders.keys())),
+                        return_exceptions=True,
+                    )
                     self._pending_broker_orders.clear()
 
         # Record equity point periodically (every 60 seconds) for run report
-        now_eq = datetime.now(IST)
-        if self._last_equity_record is None or (now_eq - self._last_equity_record).total_seconds() >= 60:
-            self._last_equity_record = now_eq
-            self.portfolio.record_equity(now_eq, dict(self._current_prices))
+        if self._last_equity_record is None or (ist_now - self._last_equity_record).total_seconds() >= 60:
+            self._last_equity_record = ist_now
+            self.portfolio.record_equity(ist_now, dict(self._current_prices))
 
         # Update risk manager
-        self.risk_manager.update_position_count(len(self.portfolio.get_all_positions()))
+        self.risk_manager.update_position_count(len(self.portfolio.positions))
 
         if self._tick_callback:
             try:
@@ -388,7 +391,6 @@ class LiveTradingRunner(BaseRunner):
 
     def _finalize_bar(self, symbol: str, bar: dict):
         """Append a completed bar to the historical cache DataFrame."""
-        import pandas as pd
         ts = bar["bar_start"]
         new_row = pd.DataFrame([{
             "open": bar["open"], "high": bar["high"],
@@ -408,9 +410,8 @@ class LiveTradingRunner(BaseRunner):
     async def place_order(self, symbol: str, exchange: str, side: str, quantity: int,
                           order_type: str = "MARKET", price: float | None = None,
                           product: str = "MIS") -> str:
-        if side.upper() == "BUY":
-            return self._context.buy(symbol, quantity, order_type, price, exchange, product)
-        return self._context.sell(symbol, quantity, order_type, price, exchange, product)
+        side = "BUY" if side.upper() == "BUY" else "SELL"
+        return self._context._place(side, symbol, quantity, order_type, price, exchange, product)
 
     async def get_positions(self) -> list:
         return self.portfolio.get_all_positions()
@@ -440,10 +441,9 @@ class LiveTradingRunner(BaseRunner):
         params = self._config.get("parameters", {})
         self._context = LiveTradingContext(runner=self, params=params)
 
-        for inst in self._instruments:
-            symbol = inst.split(":")[-1] if isinstance(inst, str) and ":" in inst else (inst if isinstance(inst, str) else inst.get("symbol", ""))
-            if symbol:
-                self._tracked_symbols.add(symbol)
+        self._symbol_list = _normalize_instruments(self._instruments)
+        self._tracked_symbols.update(self._symbol_list)
+        self._default_symbol = self._symbol_list[0] if self._symbol_list else ""
 
         self._strategy_instance.on_init(self._context)
         self._running = True
@@ -471,13 +471,14 @@ class LiveTradingRunner(BaseRunner):
 
     async def square_off_all(self) -> list[dict]:
         """Emergency: close all positions via market orders."""
-        results = self.executor.square_off_all()
+        # Stop tick handling first: the batched square-off takes a while and
+        # on_data must not place new orders meanwhile
         self._running = False
+        results = await asyncio.to_thread(self.executor.square_off_all)
         logger.warning("Emergency square off executed for session %s", self.session_id)
         return results
 
     def get_cached_history(self, symbol: str, periods: int):
-        import pandas as pd
         df = self._historical_cache.get(symbol)
         if df is not None and len(df) > 0:
             return df.tail(periods)
@@ -485,9 +486,16 @@ class LiveTradingRunner(BaseRunner):
 
     async def _check_order_statuses(self):
         """Poll Kite for pending order statuses and process fills."""
-        completed_ids = []
-        for order_id, info in self._pending_broker_orders.items():
-            status = self.executor.get_order_status(order_id)
+        if not self._pending_broker_orders:
+            return
+        # One bulk orders() call covers every pending order, run off the event
+        # loop; snapshot first since fills can place new orders
+        pending = list(self._pending_broker_orders.items())
+        statuses = await asyncio.to_thread(self.executor.get_orders_by_id)
+        fill_time = datetime.now(timezone.utc)
+        notifications: list[tuple[NotificationEventType, dict]] = []
+        for order_id, info in pending:
+            status = statuses.get(order_id)
             if not status:
                 continue
 
@@ -495,7 +503,7 @@ class LiveTradingRunner(BaseRunner):
             if kite_status == "COMPLETE":
                 from app.engine.common.events import FillEvent
                 fill = FillEvent(
-                    timestamp=datetime.now(timezone.utc),
+                    timestamp=fill_time,
                     symbol=info["symbol"],
                     exchange=info["exchange"],
                     side=info["side"],
@@ -505,7 +513,7 @@ class LiveTradingRunner(BaseRunner):
                     order_id=order_id,
                 )
                 completed_trade = self.portfolio.update_on_fill(fill)
-                completed_ids.append(order_id)
+                self._pending_broker_orders.pop(order_id, None)
 
                 # Persist to DB
                 await self._persist_fill(info, fill, order_id)
@@ -514,30 +522,30 @@ class LiveTradingRunner(BaseRunner):
 
                 # Fire notifications
                 if self._user_id:
-                    fire_notification(self._user_id, NotificationEventType.ORDER_FILLED, {
+                    notifications.append((NotificationEventType.ORDER_FILLED, {
                         "symbol": info["symbol"], "side": info["side"],
                         "quantity": fill.quantity, "price": fill.fill_price,
                         "order_id": order_id, "mode": "live",
-                    })
-                    if info.get("order_type", "").upper() in ("SL", "SL-M"):
-                        fire_notification(self._user_id, NotificationEventType.STOP_LOSS_TRIGGERED, {
+                    }))
+                    if info["order_type"] in _SL_ORDER_TYPES:
+                        notifications.append((NotificationEventType.STOP_LOSS_TRIGGERED, {
                             "symbol": info["symbol"], "side": info["side"],
                             "quantity": fill.quantity, "price": fill.fill_price, "mode": "live",
-                        })
+                        }))
                     if completed_trade:
-                        fire_notification(self._user_id, NotificationEventType.POSITION_CLOSED, {
+                        notifications.append((NotificationEventType.POSITION_CLOSED, {
                             "symbol": completed_trade["symbol"],
                             "side": completed_trade["side"],
                             "pnl": completed_trade.get("pnl"),
                             "entry_price": completed_trade.get("entry_price"),
                             "exit_price": completed_trade.get("exit_price"),
                             "mode": "live",
-                        })
+                        }))
                     else:
-                        fire_notification(self._user_id, NotificationEventType.POSITION_OPENED, {
+                        notifications.append((NotificationEventType.POSITION_OPENED, {
                             "symbol": info["symbol"], "side": info["side"],
                             "quantity": fill.quantity, "price": fill.fill_price, "mode": "live",
-                        })
+                        }))
 
                 self.slog.info(
                     f"FILLED: {info['side']} {info['symbol']} x{fill.quantity} @ {fill.fill_price:.2f}",
@@ -557,20 +565,21 @@ class LiveTradingRunner(BaseRunner):
                         self.slog.error(f"on_order_fill error: {exc}", source="runner")
 
             elif kite_status in ("REJECTED", "CANCELLED"):
-                completed_ids.append(order_id)
+                self._pending_broker_orders.pop(order_id, None)
                 reject_msg = f"{info['side']} {info['symbol']} {kite_status}: {status.get('status_message', '')}"
                 self._logs.append(f"[ORDER] {reject_msg}")
                 self.slog.warning(f"ORDER {reject_msg}", source="runner")
                 if self._user_id:
-                    fire_notification(self._user_id, NotificationEventType.ORDER_REJECTED, {
+                    notifications.append((NotificationEventType.ORDER_REJECTED, {
                         "symbol": info["symbol"], "side": info["side"],
                         "quantity": info["quantity"],
                         "reason": status.get("status_message", kite_status),
                         "mode": "live",
-                    })
+                    }))
 
-        for oid in completed_ids:
-            self._pending_broker_orders.pop(oid, None)
+        # One background task per pass, so the user's settings load once
+        if notifications:
+            fire_notifications(self._user_id, notifications)
 
     async def _persist_fill(self, order_info: dict, fill, broker_order_id: str):
         """Persist a filled order to the database."""
@@ -649,21 +658,33 @@ class LiveTradingRunner(BaseRunner):
         for trade in closed_trades:
             await self._persist_trade(trade)
 
+    def _build_position_snapshot(self, prices: dict[str, float]) -> list[dict]:
+        """Project open positions straight into snapshot dicts (no PositionInfo)."""
+        result = []
+        for pos in self.portfolio.positions.values():
+            avg_price = pos.avg_price
+            qty = pos.quantity
+            current_price = prices.get(pos.symbol, avg_price)
+            unrealized = pos.side_sign * (current_price - avg_price) * qty
+            cost = avg_price * qty
+            result.append({
+                "symbol": pos.symbol, "exchange": pos.exchange, "side": pos.side,
+                "quantity": qty, "avg_price": avg_price,
+                "current_price": current_price,
+                "unrealized_pnl": round(unrealized, 2),
+                "pnl_percent": round(unrealized / cost * 100, 4) if cost != 0 else 0.0,
+            })
+        return result
+
     def get_state_snapshot(self) -> dict:
-        positions = self._context.get_positions() if self._context else []
+        portfolio_value = self.portfolio.get_portfolio_value(self._current_prices)
         return {
             "session_id": self.session_id,
             "status": "running" if self._running and not self._paused else ("paused" if self._paused else "stopped"),
-            "portfolio_value": round(self.portfolio.get_portfolio_value(self._current_prices), 2),
+            "portfolio_value": round(portfolio_value, 2),
             "cash": round(self.portfolio.cash, 2),
-            "total_pnl": round(self.portfolio.get_portfolio_value(self._current_prices) - float(self._config.get("initial_capital", 100000)), 2),
-            "positions": [
-                {"symbol": p.symbol, "exchange": p.exchange, "side": p.side,
-                 "quantity": p.quantity, "avg_price": p.average_entry_price,
-                 "current_price": p.current_price,
-                 "unrealized_pnl": p.unrealized_pnl, "pnl_percent": p.pnl_percent}
-                for p in positions
-            ],
+            "total_pnl": round(portfolio_value - self.portfolio.initial_capital, 2),
+            "positions": self._build_position_snapshot(self._current_prices),
             "open_orders": len(self._pending_broker_orders),
             "total_trades": len(self.portfolio.trades),
             "total_charges": round(self.portfolio.total_charges, 2),
@@ -48,6 +48,16 @@ def _clean_symbol(s: str) -> str:
     return s.split(":")[-1] if ":" in s else s
 
 
+def _normalize_instruments(instruments: list) -> tuple[str, ...]:
+    """Clean symbols of an instruments list ('NSE:SBIN' or {"symbol": ...}), in order."""
+    symbols = []
+    for inst in instruments:
+        symbol = _clean_symbol(inst if isinstance(inst, str) else inst.get("symbol", ""))
+        if symbol:
+            symbols.append(symbol)
+    return tuple(symbols)
+
+
 class PaperTradingContext(TradingContext):
     """TradingContext wired to PaperTradingRunner for live simulated trading."""
 
@@ -77,7 +87,6 @@ class PaperTradingContext(TradingContext):
         sym = _clean_symbol(symbol) if symbol else self._primary_symbol()
         if not sym:
             return {}
-        now = datetime.now(IST)
         # Return the real aggregated in-progress bar
         bar = self._runner._current_bars.get(sym)
         if bar:
@@ -87,7 +96,7 @@ class PaperTradingContext(TradingContext):
                 "low": bar["low"],
                 "close": bar["close"],
                 "volume": bar["volume"],
-                "timestamp": bar.get("bar_start", now),
+                "timestamp": bar["bar_start"],
             }
         # Fallback: no bar yet, use LTP
         price = self._runner.broker.get_price(sym)
@@ -97,7 +106,7 @@ class PaperTradingContext(TradingContext):
             "low": price or 0,
             "close": price or 0,
             "volume": 0,
-            "timestamp": now,
+            "timestamp": datetime.now(IST),
         }
 
     def log(self, message: str) -> None:
@@ -125,9 +134,9 @@ class PaperTradingContext(TradingContext):
                 self._runner.slog.warning(f"BUY {symbol} blocked — time lock active at {now.strftime('%H:%M')}", source="runner")
             return ""
 
-        order_id = f"PT-{uuid.uuid4().hex[:8]}"
+        order_id = self._runner._new_order_id()
         order = OrderEvent(
-            timestamp=datetime.now(timezone.utc),
+            timestamp=self._runner._order_timestamp(),
             symbol=symbol,
             exchange=exchange,
             side="BUY",
@@ -139,7 +148,7 @@ class PaperTradingContext(TradingContext):
             product=product,
             status="pending",
         )
-        self._runner._order_queue.append(order)
+        self._runner._queue_order(order)
         self._runner._subscribe_option_if_needed(symbol)
         if self._runner.slog:
             self._runner.slog.info(f"BUY order queued: {symbol} x{quantity} @ {price or 'MARKET'}", source="runner")
@@ -152,9 +161,9 @@ class PaperTradingContext(TradingContext):
                 self._runner.slog.warning(f"SELL {symbol} blocked — time lock active at {now.strftime('%H:%M')}", source="runner")
             return ""
 
-        order_id = f"PT-{uuid.uuid4().hex[:8]}"
+        order_id = self._runner._new_order_id()
         order = OrderEvent(
-            timestamp=datetime.now(timezone.utc),
+            timestamp=self._runner._order_timestamp(),
             symbol=symbol,
             exchange=exchange,
             side="SELL",
@@ -166,31 +175,30 @@ class PaperTradingContext(TradingContext):
             product=product,
             status="pending",
         )
-        self._runner._order_queue.append(order)
+        self._runner._queue_order(order)
         self._runner._subscribe_option_if_needed(symbol)
         if self._runner.slog:
             self._runner.slog.info(f"SELL order queued: {symbol} x{quantity} @ {price or 'MARKET'}", source="runner")
         return order_id
 
     def cancel_order(self, order_id: str) -> bool:
-        for i, order in enumerate(self._runner._order_queue):
-            if order.order_id == order_id and order.status == "pending":
-                self._runner._order_queue.pop(i)
-                return True
-        return False
+        # Cancelled orders stay in the queue and are dropped by _process_orders
+        order = self._runner._pending_by_id.get(order_id)
+        if order is None or order.status != "pending":
+            return False
+        self._runner._mark_order(order, "cancelled")
+        return True
 
     def get_positions(self) -> list[PositionInfo]:
         positions = self._runner.portfolio.get_all_positions()
+        ltps = self._runner.broker.snapshot_prices()
         result = []
         for pos in positions:
             symbol = pos["symbol"]
-            current_price = self._runner.broker.get_price(symbol) or pos["avg_price"]
+            current_price = ltps.get(symbol) or pos["avg_price"]
             qty = pos["quantity"]
             avg_price = pos["avg_price"]
-            if pos["side"] == "LONG":
-                unrealized = (current_price - avg_price) * qty
-            else:
-                unrealized = (avg_price - current_price) * qty
+            unrealized = pos["side_sign"] * (current_price - avg_price) * qty
             pnl_pct = (unrealized / (avg_price * qty) * 100) if avg_price * qty != 0 else 0.0
             result.append(PositionInfo(
                 symbol=symbol, exchange=pos["exchange"], side=pos["side"],
@@ -206,8 +214,7 @@ class PaperTradingContext(TradingContext):
         return next((p for p in positions if p.symbol == symbol), None)
 
     def get_portfolio_value(self) -> float:
-        prices = {s: self._runner.broker.get_price(s) or 0 for s in self._runner._tracked_symbols}
-        return self._runner.portfolio.get_portfolio_value(prices)
+        return self._runner._portfolio_value()
 
     def get_cash(self) -> float:
         return self._runner.portfolio.cash
@@ -293,7 +300,16 @@ class PaperTradingRunner(BaseRunner):
 
         self._strategy_instance: Any = None
         self._context: Optional[PaperTradingContext] = None
+        # Orders in placement order.  Filled and cancelled orders are only
+        # marked (and counted in _dead_orders); _process_orders drops them
+        # once per pass.  Pending orders are also indexed by id for cancel.
         self._order_queue: list[OrderEvent] = []
+        self._pending_by_id: dict[str, OrderEvent] = {}
+        self._dead_orders = 0
+        # Order ids are "PT-<per-runner token>-<seq>"; one uuid per runner
+        # instead of one per order
+        self._order_id_prefix = f"PT-{uuid.uuid4().hex[:6]}-"
+        self._next_order_seq = 0
         self._historical_cache: dict[str, Any] = {}  # symbol -> DataFrame
         self._expiry_cache: list = []  # sorted list of expiry dates
         self._option_chain_cache: list[dict] = []  # option instrument dicts
@@ -313,6 +329,9 @@ class PaperTradingRunner(BaseRunner):
         self._timeframe: str = config.get("timeframe", "5m")
         self._tf_seconds: int = TIMEFRAME_SECONDS.get(self._timeframe, 300)
         self._current_bars: dict[str, dict] = {}  # symbol -> {open,high,low,close,volume,bar_start}
+        # Clock reading of the tick being handled; orders placed by strategy
+        # callbacks during that tick reuse it instead of reading the clock
+        self._tick_time: datetime | None = None
 
         # EOD square-off + time locks from parameters
         params = config.get("parameters", {})
@@ -350,7 +369,8 @@ class PaperTradingRunner(BaseRunner):
 
         # Update broker prices
         self.broker.update_prices(data)
-        self._tracked_symbols.update(data.keys())
+        if not data.keys() <= self._tracked_symbols:
+            self._tracked_symbols.update(data.keys())
         logger.debug("Tick: %s", {k: round(v, 2) for k, v in data.items()})
 
         # --- Bar aggregation ---
@@ -382,36 +402,42 @@ class PaperTradingRunner(BaseRunner):
                     cur["low"] = price
                 cur["close"] = price
 
-        # Call strategy on_tick for every tick (tick-based entry/logic)
-        if self._strategy_instance and self._context:
-            for symbol, price in data.items():
-                try:
-                    self._strategy_instance.on_tick(self._context, symbol, price)
-                except Exception as exc:
-                    self._logs.append(f"[ERROR] on_tick: {type(exc).__name__}: {exc}")
-                    logger.warning("Paper strategy on_tick error: %s", exc)
+        # Orders placed by strategy callbacks during this tick are stamped
+        # with its clock reading; cleared even if a callback pass raises
+        self._tick_time = now
+        try:
+            # Call strategy on_tick for every tick (tick-based entry/logic)
+            if self._strategy_instance and self._context:
+                for symbol, price in data.items():
+                    try:
+                        self._strategy_instance.on_tick(self._context, symbol, price)
+                    except Exception as exc:
+                        self._logs.append(f"[ERROR] on_tick: {type(exc).__name__}: {exc}")
+                        logger.warning("Paper strategy on_tick error: %s", exc)
 
-        # Try to fill pending orders on every tick
-        await self._process_orders()
+            # Try to fill pending orders on every tick
+            await self._process_orders()
 
-        # Call strategy only when a bar completes (matches backtest behaviour)
-        if bar_completed and self._strategy_instance and self._context:
-            logger.info("Bar completed — calling on_data (session=%s)", self.session_id)
-            try:
-                self._strategy_instance.on_data(self._context)
-            except Exception as exc:
-                self._logs.append(f"[ERROR] on_data: {type(exc).__name__}: {exc}")
-                logger.warning("Paper strategy on_data error: %s", exc)
-                self.slog.error(f"on_data error: {type(exc).__name__}: {exc}", source="runner")
-                if self._user_id:
-                    fire_notification(self._user_id, NotificationEventType.SESSION_CRASHED, {
-                        "session_id": self.session_id,
-                        "error": f"{type(exc).__name__}: {exc}",
-                        "mode": "paper",
-                    })
+            # Call strategy only when a bar completes (matches backtest behaviour)
+            if bar_completed and self._strategy_instance and self._context:
+                logger.info("Bar completed — calling on_data (session=%s)", self.session_id)
+                try:
+                    self._strategy_instance.on_data(self._context)
+                except Exception as exc:
+                    self._logs.append(f"[ERROR] on_data: {type(exc).__name__}: {exc}")
+                    logger.warning("Paper strategy on_data error: %s", exc)
+                    self.slog.error(f"on_data error: {type(exc).__name__}: {exc}", source="runner")
+                    if self._user_id:
+                        fire_notification(self._user_id, NotificationEventType.SESSION_CRASHED, {
+                            "session_id": self.session_id,
+                            "error": f"{type(exc).__name__}: {exc}",
+                            "mode": "paper",
+                        })
 
-            # Process any new orders placed during on_data
-            await self._process_orders()
+                # Process any new orders placed during on_data
+                await self._process_orders()
+        finally:
+            self._tick_time = None
 
         # EOD square-off AFTER on_data so strategy has a chance to exit first
         if self._eod_time:
@@ -421,7 +447,7 @@ class PaperTradingRunner(BaseRunner):
             if now_time >= self._eod_time and self._eod_done_today != today_str:
                 self._eod_done_today = today_str
                 if self.portfolio.positions:
-                    prices = {s: self.broker.get_price(s) or 0 for s in self._tracked_symbols}
+                    prices = self._tracked_prices()
                     closed = self.portfolio.close_all_positions(prices, ist_now)
                     for pos in closed:
                         sym = pos.get("symbol", "?")
@@ -451,8 +477,17 @@ class PaperTradingRunner(BaseRunner):
                     await self._persist_eod_trades(closed)
                 # Cancel ALL pending orders after EOD close
                 if self._order_queue:
-                    self.slog.info(f"EOD: cancelled {len(self._order_queue)} pending order(s)", source="runner")
+                    # Mark them too, so an in-flight _process_orders pass skips them
+                    cancelled = 0
+                    for o in self._order_queue:
+                        if o.status == "pending":
+                            o.status = "cancelled"
+                            cancelled += 1
+                    if cancelled:
+                        self.slog.info(f"EOD: cancelled {cancelled} pending order(s)", source="runner")
                     self._order_queue.clear()
+                    self._pending_by_id.clear()
+                    self._dead_orders = 0
 
         # Invoke update callback (for Socket.IO emission) on every tick
         if self._tick_callback:
@@ -485,7 +520,7 @@ class PaperTradingRunner(BaseRunner):
         self.slog.info(msg, source="runner")
 
         # Record equity point for run report
-        prices = {s: self.broker.get_price(s) or 0 for s in self._tracked_symbols}
+        prices = self._tracked_prices()
         self.portfolio.record_equity(ts, prices)
 
     async def place_order(self, symbol: str, exchange: str, side: str, quantity: int,
@@ -499,8 +534,33 @@ class PaperTradingRunner(BaseRunner):
         return self.portfolio.get_all_positions()
 
     async def get_portfolio_value(self) -> float:
-        prices = {s: self.broker.get_price(s) or 0 for s in self._tracked_symbols}
-        return self.portfolio.get_portfolio_value(prices)
+        return self._portfolio_value()
+
+    def _order_timestamp(self) -> datetime:
+        return self._tick_time or datetime.now(timezone.utc)
+
+    def _queue_order(self, order: OrderEvent) -> None:
+        self._order_queue.append(order)
+        self._pending_by_id[order.order_id] = order
+
+    def _mark_order(self, order: OrderEvent, status: str) -> None:
+        """Take *order* out of the pending set; it is dropped from the queue later."""
+        order.status = status
+        self._pending_by_id.pop(order.order_id, None)
+        self._dead_orders += 1
+
+    def _new_order_id(self) -> str:
+        seq = self._next_order_seq
+        self._next_order_seq = seq + 1
+        return f"{self._order_id_prefix}{seq}"
+
+    def _tracked_prices(self) -> dict[str, float]:
+        """Current LTP of every tracked symbol (0 when no tick has arrived yet)."""
+        ltps = self.broker.snapshot_prices()
+        return {s: ltps.get(s) or 0 for s in self._tracked_symbols}
+
+    def _portfolio_value(self) -> float:
+        return self.portfolio.get_portfolio_value(self._tracked_prices())
 
     async def get_cash(self) -> float:
         return self.portfolio.cash
@@ -534,13 +594,7 @@ class PaperTradingRunner(BaseRunner):
         self._context = PaperTradingContext(runner=self, params=params)
 
         # Parse instrument symbols
-        for inst in self._instruments:
-            if isinstance(inst, str):
-                symbol = inst.split(":")[-1] if ":" in inst else inst
-            else:
-                symbol = inst.get("symbol", "")
-            if symbol:
-                self._tracked_symbols.add(symbol)
+        self._tracked_symbols.update(_normalize_instruments(self._instruments))
 
         # Call on_init
         self._strategy_instance.on_init(self._context)
@@ -593,8 +647,16 @@ class PaperTradingRunner(BaseRunner):
 
     async def _process_orders(self):
         """Try to fill all pending orders."""
-        still_pending = []
-        for order in self._order_queue:
+        queue = self._order_queue
+        if not queue:
+            return
+        # Orders stay in the shared queue while fills are awaited, so
+        # cancel/modify calls from other coroutines still see them.  Orders
+        # placed from on_order_fill are appended and reached in this pass.
+        i = 0
+        while i < len(queue):
+            order = queue[i]
+            i += 1
             if order.status != "pending":
                 continue
             # Fetch option price on-demand if broker has no price
@@ -607,9 +669,12 @@ class PaperTradingRunner(BaseRunner):
                         self.broker.update_prices({order.symbol: float(ltp)})
                 except Exception:
                     pass
+            # Cancelled while the LTP was fetched
+            if order.status != "pending":
+                continue
             fill = self.broker.try_fill_order(order)
             if fill:
-                order.status = "completed"
+                self._mark_order(order, "completed")
                 completed_trade = self.portfolio.update_on_fill(fill)
 
                 # Persist order to DB
@@ -662,9 +727,10 @@ class PaperTradingRunner(BaseRunner):
                 fill_msg = f"FILLED: {fill.side} {fill.symbol} x{fill.quantity} @ {fill.fill_price:.2f}"
                 logger.info("Paper %s", fill_msg)
                 self.slog.info(fill_msg, source="runner")
-            else:
-                still_pending.append(order)
-        self._order_queue = still_pending
+        # Drop filled and cancelled orders without rebinding the queue
+        if self._dead_orders:
+            queue[:] = [o for o in queue if o.status == "pending"]
+            self._dead_orders = 0
 
     async def _persist_fill(self, order: OrderEvent, fill: FillEvent):
         """Persist a filled order to the database."""
@@ -743,23 +809,6 @@ class PaperTradingRunner(BaseRunner):
         for trade in closed_trades:
             await self._persist_trade(trade)
 
-    def _get_pending_sl_tp(self, symbol: str, side: str) -> dict:
-        """Find pending SL and TP orders for a position."""
-        result: dict = {"sl_price": None, "tp_price": None, "sl_order_id": None, "tp_order_id": None}
-        # For SHORT position: SL = pending BUY SL/SL-M, TP = pending BUY LIMIT
-        # For LONG position: SL = pending SELL SL/SL-M, TP = pending SELL LIMIT
-        close_side = "BUY" if side in ("SHORT", "SELL") else "SELL"
-        for order in self._order_queue:
-            if order.status != "pending" or order.symbol != symbol or order.side != close_side:
-                continue
-            if order.order_type in ("SL", "SL-M"):
-                result["sl_price"] = order.trigger_price or order.price
-                result["sl_order_id"] = order.order_id
-            elif order.order_type == "LIMIT":
-                result["tp_price"] = order.price
-                result["tp_order_id"] = order.order_id
-        return result
-
     def close_position(self, symbol: str) -> str | None:
         """Close a position by cancelling pending orders and placing a market close."""
         pos = None
@@ -770,12 +819,14 @@ class PaperTradingRunner(BaseRunner):
         if not pos:
             return None
         # Cancel all pending orders for this symbol
-        self._order_queue = [o for o in self._order_queue if not (o.symbol == symbol and o.status == "pending")]
+        for o in self._order_queue:
+            if o.symbol == symbol and o.status == "pending":
+                self._mark_order(o, "cancelled")
         # Place market close order
         close_side = "BUY" if pos["side"] in ("SHORT", "SELL") else "SELL"
-        order_id = f"PT-{uuid.uuid4().hex[:8]}"
+        order_id = self._new_order_id()
         order = OrderEvent(
-            timestamp=datetime.now(timezone.utc),
+            timestamp=self._order_timestamp(),
             symbol=symbol,
             exchange=pos.get("exchange", "NFO"),
             side=close_side,
@@ -785,7 +836,7 @@ class PaperTradingRunner(BaseRunner):
             product="MIS",
             status="pending",
         )
-        self._order_queue.append(order)
+        self._queue_order(order)
         self.slog.info(f"Manual close: {close_side} {symbol} x{pos['quantity']} @ MARKET", source="runner")
         return order_id
 
@@ -818,28 +869,57 @@ class PaperTradingRunner(BaseRunner):
 
     def get_state_snapshot(self) -> dict:
         """Return current state for Socket.IO emission."""
-        prices = {s: self.broker.get_price(s) or 0 for s in self._tracked_symbols}
-        positions = self._context.get_positions() if self._context else []
+        prices = self._tracked_prices()
+
+        # Pending SL / TP per (symbol, closing side) and the open-order count,
+        # in one pass over the queue.  If a position has several pending SL
+        # (or TP) orders, the most recently placed one is reported.
+        no_sl_tp = {"sl_price": None, "tp_price": None, "sl_order_id": None, "tp_order_id": None}
+        sl_tp_index: dict[tuple[str, str], dict] = {}
+        open_orders = 0
+        for order in self._order_queue:
+            if order.status != "pending":
+                continue
+            open_orders += 1
+            if order.order_type in ("SL", "SL-M"):
+                entry = sl_tp_index.setdefault((order.symbol, order.side), dict(no_sl_tp))
+                entry["sl_price"] = order.trigger_price or order.price
+                entry["sl_order_id"] = order.order_id
+            elif order.order_type == "LIMIT":
+                entry = sl_tp_index.setdefault((order.symbol, order.side), dict(no_sl_tp))
+                entry["tp_price"] = order.price
+                entry["tp_order_id"] = order.order_id
+
+        ltps = self.broker.snapshot_prices()
         pos_list = []
-        for p in positions:
-            sl_tp = self._get_pending_sl_tp(p.symbol, p.side)
+        for pos in self.portfolio.positions.values():
+            symbol = pos.symbol
+            avg_price = pos.avg_price
+            qty = pos.quantity
+            current_price = ltps.get(symbol) or avg_price
+            unrealized = pos.side_sign * (current_price - avg_price) * qty
+            cost = avg_price * qty
+            close_side = "BUY" if pos.side == "SHORT" else "SELL"
+            sl_tp = sl_tp_index.get((symbol, close_side), no_sl_tp)
             pos_list.append({
-                "symbol": p.symbol, "exchange": p.exchange, "side": p.side,
-                "quantity": p.quantity, "avg_price": p.average_entry_price,
-                "current_price": p.current_price,
-                "unrealized_pnl": p.unrealized_pnl, "pnl_percent": p.pnl_percent,
+                "symbol": symbol, "exchange": pos.exchange, "side": pos.side,
+                "quantity": qty, "avg_price": avg_price,
+                "current_price": current_price,
+                "unrealized_pnl": round(unrealized, 2),
+                "pnl_percent": round(unrealized / cost * 100, 4) if cost != 0 else 0.0,
                 "sl_price": sl_tp["sl_price"], "tp_price": sl_tp["tp_price"],
                 "sl_order_id": sl_tp["sl_order_id"], "tp_order_id": sl_tp["tp_order_id"],
             })
+        portfolio_value = self.portfolio.get_portfolio_value(prices)
         return {
             "session_id": self.session_id,
             "status": "running" if self._running and not self._paused else ("paused" if self._paused else "stopped"),
-            "portfolio_value": round(self.portfolio.get_portfolio_value(prices), 2),
+            "portfolio_value": round(portfolio_value, 2),
             "cash": round(self.portfolio.cash, 2),
-            "total_pnl": round(self.portfolio.get_portfolio_value(prices) - float(self._config.get("initial_capital", 100000)), 2),
+            "total_pnl": round(portfolio_value - self.portfolio.initial_capital, 2),
             "positions": pos_list,
-            "open_orders": len(self._order_queue),
+            "open_orders": open_orders,
             "total_trades": len(self.portfolio.trades),
             "total_charges": round(self.portfolio.total_charges, 2),
-            "prices": {s: prices.get(s, 0) for s in self._tracked_symbols},
+            "prices": prices,
         }
@@ -2,6 +2,7 @@
 import logging
 import uuid
 from datetime import datetime, timezone
+from collections.abc import Mapping
 from typing import Optional
 from app.engine.common.events import OrderEvent, FillEvent
 from app.integrations.kite_connect.constants import (
@@ -26,6 +27,10 @@ class SimulatedBroker:
     def get_price(self, symbol: str) -> Optional[float]:
         return self._current_prices.get(symbol)
 
+    def snapshot_prices(self) -> Mapping[str, float]:
+        """Live view of all current LTPs, for bulk lookups. Do not mutate."""
+        return self._current_prices
+
     def try_fill_order(self, order: OrderEvent) -> Optional[FillEvent]:
         """Attempt to fill an order at current LTP."""
         ltp = self._current_prices.get(order.symbol)
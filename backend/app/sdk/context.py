@@ -158,6 +158,64 @@ class TradingContext:
             "sell() must be implemented by the execution engine"
         )
 
+    def buy_many(
+        self,
+        symbols: list[str],
+        quantities: list[int],
+        exchange: str = "NSE",
+        product: str = "MIS",
+    ) -> list[str]:
+        """
+        Place a **buy** MARKET order for each symbol in a basket.
+
+        Engines may batch the orders; by default this simply calls
+        :meth:`buy` once per symbol.
+
+        Args:
+            symbols: Instrument symbols.
+            quantities: Quantity for each symbol (same length as *symbols*).
+            exchange: Exchange segment for every order.
+            product: Product type for every order.
+
+        Returns:
+            The order-id for each symbol, in order (``""`` if blocked).
+        """
+        if len(symbols) != len(quantities):
+            raise ValueError("symbols and quantities must have the same length")
+        return [
+            self.buy(symbol, quantity, exchange=exchange, product=product)
+            for symbol, quantity in zip(symbols, quantities)
+        ]
+
+    def sell_many(
+        self,
+        symbols: list[str],
+        quantities: list[int],
+        exchange: str = "NSE",
+        product: str = "MIS",
+    ) -> list[str]:
+        """
+        Place a **sell** MARKET order for each symbol in a basket.
+
+        Engines may batch the orders; by default this simply calls
+        :meth:`sell` once per symbol.
+
+        Args:
+            symbols: Instrument symbols.
+            quantities: Quantity for each symbol (same length as *symbols*).
+            exchange: Exchange segment for every order.
+            product: Product type for every order.
+
+        Returns:
+            The order-id for each symbol, in order (``""`` if blocked).
+        """
+        if len(symbols) != len(quantities):
+            raise ValueError("symbols and quantities must have the same length")
+        return [
+            self.sell(symbol, quantity, exchange=exchange, product=product)
+            for symbol, quantity in zip(symbols, quantities)
+        ]
+
     def cancel_order(self, order_id: str) -> bool:
         """
         Cancel an open order.
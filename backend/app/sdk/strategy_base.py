@@ -1,10 +1,18 @@
 from __future__ import annotations
+from contextvars import ContextVar
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.sdk.context import TradingContext
     from app.sdk.types import FilledOrder
 
+# Collects Strategy subclasses as they are defined.  The strategy loader sets
+# a fresh list before exec'ing user code and reads it back afterwards; outside
+# of loading the value is ``None`` and nothing is recorded.
+_defined_subclasses: ContextVar[list[type] | None] = ContextVar(
+    "_defined_subclasses", default=None,
+)
+
 
 class Strategy:
     """
@@ -24,6 +32,12 @@ class Strategy:
                     ctx.buy("RELIANCE", quantity=10)
     """
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        registry = _defined_subclasses.get()
+        if registry is not None:
+            registry.append(cls)
+
     def on_init(self, ctx: "TradingContext") -> None:
         """Called once when the strategy starts. Use for initialization."""
         pass
@@ -46,7 +46,7 @@ class FilledOrder:
     timestamp: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class PositionInfo:
     symbol: str
     exchange: str
@@ -136,6 +136,51 @@ async def _send_sms(
 # Public API
 # ---------------------------------------------------------------------------
 
+async def _load_settings(user_id: UUID) -> NotificationSettings | None:
+    async with async_session_factory() as db:
+        result = await db.execute(
+            select(NotificationSettings).where(NotificationSettings.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+
+async def _dispatch(ns: NotificationSettings, event_type: NotificationEventType, payload: dict) -> None:
+    """Send one event to every channel the user enabled for it."""
+    event_channels = ns.event_channels or {}
+    channels = event_channels.get(event_type.value, [])
+    if not channels:
+        return
+
+    message = _format_message(event_type, payload)
+    tasks = []
+
+    if "telegram" in channels and ns.telegram_enabled and ns.telegram_bot_token_enc and ns.telegram_chat_id:
+        bot_token = decrypt(ns.telegram_bot_token_enc)
+        tasks.append(_send_telegram(bot_token, ns.telegram_chat_id, message))
+
+    if "email" in channels and ns.email_enabled and ns.smtp_host and ns.smtp_password_enc:
+        subject = f"AlgoTrader: {EVENT_TITLES.get(event_type, event_type.value)}"
+        password = decrypt(ns.smtp_password_enc)
+        tasks.append(_send_email(
+            ns.smtp_host, ns.smtp_port or 587, ns.smtp_username or "",
+            password, ns.smtp_use_tls, ns.email_from or "", ns.email_to or "",
+            subject, message,
+        ))
+
+    if "sms" in channels and ns.sms_enabled and ns.twilio_auth_token_enc and ns.twilio_from_number:
+        auth_token = decrypt(ns.twilio_auth_token_enc)
+        tasks.append(_send_sms(
+            ns.twilio_account_sid or "", auth_token,
+            ns.twilio_from_number, ns.sms_to_number or "", message[:1600],
+        ))
+
+    if tasks:
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                logger.warning("Notification channel failed: %s", r)
+
+
 async def notify(user_id: UUID, event_type: NotificationEventType, payload: dict) -> None:
     """
     Fire-and-forget notification dispatcher.
@@ -145,51 +190,31 @@ async def notify(user_id: UUID, event_type: NotificationEventType, payload: dict
     Call via asyncio.create_task() so it never blocks the trading engine.
     """
     try:
-        async with async_session_factory() as db:
-            result = await db.execute(
-                select(NotificationSettings).where(NotificationSettings.user_id == user_id)
-            )
-            ns = result.scalar_one_or_none()
-
+        ns = await _load_settings(user_id)
         if not ns:
             return
+        await _dispatch(ns, event_type, payload)
+    except Exception as exc:
+        logger.error("notify() failed for user %s event %s: %s", user_id, event_type, exc)
 
-        event_channels = ns.event_channels or {}
-        channels = event_channels.get(event_type.value, [])
-        if not channels:
-            return
-
-        message = _format_message(event_type, payload)
-        tasks = []
-
-        if "telegram" in channels and ns.telegram_enabled and ns.telegram_bot_token_enc and ns.telegram_chat_id:
-            bot_token = decrypt(ns.telegram_bot_token_enc)
-            tasks.append(_send_telegram(bot_token, ns.telegram_chat_id, message))
-
-        if "email" in channels and ns.email_enabled and ns.smtp_host and ns.smtp_password_enc:
-            subject = f"AlgoTrader: {EVENT_TITLES.get(event_type, event_type.value)}"
-            password = decrypt(ns.smtp_password_enc)
-            tasks.append(_send_email(
-                ns.smtp_host, ns.smtp_port or 587, ns.smtp_username or "",
-                password, ns.smtp_use_tls, ns.email_from or "", ns.email_to or "",
-                subject, message,
-            ))
-
-        if "sms" in channels and ns.sms_enabled and ns.twilio_auth_token_enc and ns.twilio_from_number:
-            auth_token = decrypt(ns.twilio_auth_token_enc)
-            tasks.append(_send_sms(
-                ns.twilio_account_sid or "", auth_token,
-                ns.twilio_from_number, ns.sms_to_number or "", message[:1600],
-            ))
-
-        if tasks:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for r in results:
-                if isinstance(r, Exception):
-                    logger.warning("Notification channel failed: %s", r)
 
+async def notify_many(
+    user_id: UUID, events: list[tuple[NotificationEventType, dict]]
+) -> None:
+    """Like :func:`notify` for several events, loading the settings only once."""
+    try:
+        ns = await _load_settings(user_id)
+        if not ns:
+            return
+        results = await asyncio.gather(
+            *(_dispatch(ns, event_type, payload) for event_type, payload in events),
+            return_exceptions=True,
+        )
+        for (event_type, _), r in zip(events, results):
+            if isinstance(r, Exception):
+                logger.error("notify() failed for user %s event %s: %s", user_id, event_type, r)
     except Exception as exc:
-        logger.error("notify() failed for user %s event %s: %s", user_id, event_type, exc)
+        logger.error("notify_many() failed for user %s: %s", user_id, exc)
 
 
 def fire_notification(user_id, event_type: NotificationEventType, payload: dict):
@@ -201,6 +226,17 @@ def fire_notification(user_id, event_type: NotificationEventType, payload: dict)
         pass
 
 
+def fire_notifications(user_id, events: list[tuple[NotificationEventType, dict]]):
+    """Schedule several notifications as one background task (fire-and-forget)."""
+    if not events:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+        loop.create_task(notify_many(user_id, events))
+    except RuntimeError:
+        pass
+
+
 async def send_test_notification(ns: NotificationSettings, channel: str) -> str:
     """Send a test notification to a specific channel. Returns status message."""
     test_message = "[TEST] AlgoTrader notification system is working!"